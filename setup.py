@@ -12,7 +12,8 @@ def readme():
 install_requires = [
     'pyyaml',
     'tastic',
-    'fundamentals'
+    'fundamentals',
+    'scandir; python_version < "3.5"'
 ]
 
 # READ THE DOCS SERVERS
@@ -6,9 +6,9 @@ Documentation for tastic can be found here: http://tastic-for-taskpaper.readthed
 
 Usage:
     tastic init
-    tastic sort <pathToFileOrWorkspace> [-s <pathToSettingsFile>]
-    tastic archive <pathToFileOrWorkspace> [-s <pathToSettingsFile>]
-    tastic [-f] sync <pathToWorkspace> <workspaceName> <pathToSyncFolder> [<editorialRootPath>] [-s <pathToSettingsFile>]
+    tastic sort <pathToFileOrWorkspace> [-s <pathToSettingsFile>] [--jobs=<jobs>]
+    tastic archive <pathToFileOrWorkspace> [-s <pathToSettingsFile>] [--jobs=<jobs>]
+    tastic [-f] sync <pathToWorkspace> <workspaceName> <pathToSyncFolder> [<editorialRootPath>] [-s <pathToSettingsFile>] [--jobs=<jobs>]
     tastic reminders import <listName> <pathToTaskpaperDoc> 
 
 Options:
@@ -30,6 +30,7 @@ Options:
     -v, --version            show version
     -s, --settings           the settings file
     -f, --fileTags           if the tag to sync is in the filepath (e.g. /@due/mytasks.taskpaper) include all items the file in that tag set
+    --jobs=<jobs>            the number of taskpaper files to work on in parallel (0 for one per CPU). Default 1
 
 """
 ################# GLOBAL IMPORTS ####################
@@ -101,6 +102,10 @@ def main(arguments=None):
             pass
 
     # CALL FUNCTIONS/OBJECTS
+    jobs = 1
+    if jobsFlag:
+        jobs = int(jobsFlag)
+
     if sort or archive:
 
         ws = workspace(
@@ -108,10 +113,12 @@ def main(arguments=None):
             settings=settings,
             fileOrWorkspacePath=pathToFileOrWorkspace
         )
+    # FILES THAT COULD NOT BE SORTED OR ARCHIVED ARE REPORTED AT THE END
+    failures = []
     if sort:
-        ws.sort()
+        failures += [r for r in ws.sort(jobs=jobs) if r[2]]
     if archive:
-        ws.archive_done()
+        failures += [r for r in ws.archive_done(jobs=jobs) if r[2]]
 
     if sync:
         tp = syncc(
@@ -123,7 +130,7 @@ def main(arguments=None):
             editorialRootPath=editorialRootPath,
             includeFileTags=fileTagsFlag
         )
-        tp.sync()
+        tp.sync(jobs=jobs)
 
     if reminders:
         r = reminderss(
@@ -144,6 +151,13 @@ def main(arguments=None):
     log.info('-- FINISHED ATTEMPT TO RUN THE cl_utils.py AT %s (RUNTIME: %s) --' %
              (endTime, runningTime, ))
 
+    if len(failures):
+        sys.stderr.write("%s taskpaper file(s) failed:\n" % (len(failures),))
+        for taskpaperPath, seconds, error in failures:
+            sys.stderr.write("    %s: %s\n" %
+                             (taskpaperPath, error.strip().split("\n")[-1]))
+        sys.exit(1)
+
     return
 
 
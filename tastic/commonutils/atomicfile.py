@@ -0,0 +1,75 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Write files atomically, so a crash mid-write never leaves a partial file behind*
+
+:Author:
+    David Young
+
+:Date Created:
+    October 18, 2026
+"""
+import os
+import codecs
+import tempfile
+
+
+def atomic_write(
+        filepath,
+        writeContent,
+        encoding='utf-8'):
+    """*write a file via a temporary file in the same directory, swapped into place once it is safely on disk*
+
+    The content is written to a temporary file alongside the target, flushed and fsynced, then renamed over the target. Readers only ever see the old file or the complete new one. The permissions of an existing file are kept, and a symlinked file is written through the link to its target, leaving the link in place.
+
+    **Key Arguments:**
+        - ``filepath`` -- the path of the file to write
+        - ``writeContent`` -- a function taking the open (temporary) file and writing the content to it
+        - ``encoding`` -- the encoding of the file, or ``None`` to write bytes. Default *utf-8*
+
+    **Usage:**
+
+        .. code-block:: python
+
+            from tastic.commonutils.atomicfile import atomic_write
+            atomic_write("/path/to/saturday-tasks.taskpaper",
+                         lambda writeFile: writeFile.write(u"- a task"))
+    """
+    # WRITE TO THE TARGET OF A SYMLINK, NOT OVER THE LINK ITSELF
+    filepath = os.path.realpath(filepath)
+    directory = os.path.dirname(filepath)
+    fd, tmpPath = tempfile.mkstemp(
+        dir=directory, prefix="." + os.path.basename(filepath) + ".", suffix=".tmp")
+    try:
+        rawFile = os.fdopen(fd, "wb")
+        try:
+            if encoding:
+                writeFile = codecs.getwriter(encoding)(rawFile)
+            else:
+                writeFile = rawFile
+            writeContent(writeFile)
+            writeFile.flush()
+            os.fsync(rawFile.fileno())
+        finally:
+            rawFile.close()
+
+        # MKSTEMP CREATES PRIVATE FILES - KEEP THE MODE OF THE FILE WE REPLACE
+        if os.path.exists(filepath):
+            os.chmod(tmpPath, os.stat(filepath).st_mode & 0o7777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmpPath, 0o666 & ~umask)
+
+        try:
+            os.rename(tmpPath, filepath)
+        except OSError:
+            # WINDOWS WILL NOT RENAME OVER AN EXISTING FILE
+            os.remove(filepath)
+            os.rename(tmpPath, filepath)
+    except:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+    return None
@@ -0,0 +1,106 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Find the files within a directory tree, pruning ignored directories before walking into them*
+
+:Author:
+    David Young
+
+:Date Created:
+    October 18, 2026
+"""
+import os
+import stat
+import fnmatch
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# DIRECTORIES THAT NEVER CONTAIN TASKPAPER DOCUMENTS WORTH LOOKING AT
+defaultIgnores = (".git", ".hg", ".svn", "node_modules")
+
+
+def find_files(
+        rootPath,
+        extension=".taskpaper",
+        ignore=None,
+        ignorePaths=None):
+    """*lazily yield the paths of all the files with a given extension within a directory tree*
+
+    Directories are listed with ``os.scandir`` (or, on python 2.7, the ``scandir`` backport installed alongside tastic - falling back to the slower ``os.listdir`` where neither is available) and ignored directories are pruned before they are descended into. Files come out in the order ``os.walk`` would visit them, with the entries of each directory sorted by name. Symlinked directories are not followed and unreadable directories are skipped.
+
+    **Key Arguments:**
+        - ``rootPath`` -- the root of the directory tree
+        - ``extension`` -- only yield files with this extension. Default *.taskpaper*
+        - ``ignore`` -- a list of glob patterns. A directory or file is skipped if its name, or its path relative to ``rootPath``, matches one of them. Default *None* (``defaultIgnores``)
+        - ``ignorePaths`` -- a list of directory paths to skip (e.g. a sync folder). Default *None*
+
+    **Return:**
+        - ``filepaths`` -- a generator of the matching filepaths
+
+    **Usage:**
+
+        .. code-block:: python
+
+            from tastic.commonutils.discovery import find_files
+            for filepath in find_files("/path/to/workspace", ignore=[".git", "node_modules", "old-*"]):
+                print filepath
+    """
+    if ignore is None:
+        ignore = defaultIgnores
+    ignorePaths = set(os.path.normcase(os.path.abspath(p))
+                      for p in (ignorePaths or []))
+
+    def ignored(name, relPath):
+        for pattern in ignore:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relPath, pattern):
+                return True
+        return False
+
+    stack = [(rootPath, "")]
+    while stack:
+        dirPath, relDir = stack.pop()
+        try:
+            entries = sorted(_list_directory(dirPath))
+        except OSError:
+            continue
+
+        subdirs = []
+        for name, isDir, isFile in entries:
+            relPath = os.path.join(relDir, name)
+            if ignored(name, relPath):
+                continue
+            path = os.path.join(dirPath, name)
+            if isDir:
+                if os.path.normcase(os.path.abspath(path)) not in ignorePaths:
+                    subdirs.append((path, relPath))
+            elif isFile and os.path.splitext(name)[1] == extension:
+                yield path
+
+        stack.extend(reversed(subdirs))
+
+
+def _list_directory(
+        dirPath):
+    """*list a directory as ``(name, isDir, isFile)`` tuples - ``isDir`` is false for symlinks to directories*
+    """
+    if scandir:
+        return [(e.name, e.is_dir(follow_symlinks=False), e.is_file()) for e in scandir(dirPath)]
+
+    entries = []
+    for name in os.listdir(dirPath):
+        path = os.path.join(dirPath, name)
+        try:
+            mode = os.lstat(path).st_mode
+        except OSError:
+            continue
+        if stat.S_ISLNK(mode):
+            isDir, isFile = False, os.path.isfile(path)
+        else:
+            isDir, isFile = stat.S_ISDIR(mode), stat.S_ISREG(mode)
+        entries.append((name, isDir, isFile))
+    return entries
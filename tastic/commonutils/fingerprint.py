@@ -0,0 +1,49 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Fingerprint files, to tell cheaply whether they have changed since they were last seen*
+
+:Author:
+    David Young
+
+:Date Created:
+    October 18, 2026
+"""
+import os
+import hashlib
+
+
+def file_fingerprint(
+        filepath,
+        previous=None):
+    """*get the fingerprint of a file - its size, modification time and the sha1 of its content*
+
+    **Key Arguments:**
+        - ``filepath`` -- path to the file
+        - ``previous`` -- a previously recorded fingerprint of the file. If the size and modification time still match it, it is returned without reading the file. Default *None*
+
+    **Return:**
+        - ``fingerprint`` -- a ``(size, mtime, sha1)`` tuple, or ``None`` if the file can not be read
+
+    **Usage:**
+
+        A file that was only touched keeps the same content hash:
+
+        .. code-block:: python
+
+            from tastic.commonutils.fingerprint import file_fingerprint
+            fingerprint = file_fingerprint("/path/to/saturday-tasks.taskpaper", previous)
+            changed = not fingerprint or not previous or fingerprint[2] != previous[2]
+    """
+    try:
+        stat = os.stat(filepath)
+        if previous and tuple(previous[:2]) == (stat.st_size, stat.st_mtime):
+            return tuple(previous)
+        readFile = open(filepath, "rb")
+        try:
+            sha1 = hashlib.sha1(readFile.read()).hexdigest()
+        finally:
+            readFile.close()
+    except (IOError, OSError):
+        return None
+    return stat.st_size, stat.st_mtime, sha1
@@ -0,0 +1,266 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*A piece-table text buffer supporting cheap edits at arbitrary offsets*
+
+:Author:
+    David Young
+
+:Date Created:
+    October 18, 2026
+"""
+import bisect
+
+
+class piecetable(object):
+    """
+    *A piece-table text buffer*
+
+    The text is held as a list of pieces, each a span of either the original text or of a string inserted by an edit. Splicing the buffer only splits and replaces pieces, so the cost of an edit does not depend on the length of the text. The full string is only built when it is asked for (and is then cached until the next edit).
+
+    **Key Arguments:**
+        - ``text`` -- the initial text of the buffer. Default *""*
+
+    **Usage:**
+
+        .. code-block:: python
+
+            from tastic.commonutils.piecetable import piecetable
+            buffer = piecetable(u"- a task\\n- another task")
+            buffer.splice(8, 8, u" @due")
+            print unicode(buffer)
+            print buffer[2:8]
+    """
+    # THE NUMBER OF PIECES ALLOWED TO BUILD UP BEFORE THEY ARE COMPACTED BACK
+    # INTO A SINGLE STRING
+    maxPieces = 1024
+
+    def __init__(
+            self,
+            text=u""):
+        self._pieces = []
+        if len(text):
+            self._pieces.append((text, 0, len(text)))
+        self._length = len(text)
+        self._starts = None
+        self._text = text
+
+    def __len__(self):
+        return self._length
+
+    def __unicode__(self):
+        if self._text is None:
+            self._text = u"".join(source[start:start + length]
+                                  for source, start, length in self._pieces)
+            # COMPACT THE PIECES WHILE WE HAVE THE WHOLE STRING TO HAND
+            self._pieces = []
+            if self._length:
+                self._pieces.append((self._text, 0, self._length))
+            self._starts = None
+        return self._text
+
+    def __getitem__(
+            self,
+            key):
+        if isinstance(key, slice):
+            start, end, step = key.indices(self._length)
+            if step != 1:
+                return unicode(self)[key]
+        else:
+            if key < 0:
+                key += self._length
+            if key < 0 or key >= self._length:
+                raise IndexError("piecetable index out of range")
+            start, end = key, key + 1
+
+        if self._text is not None:
+            return self._text[start:end]
+        if end <= start:
+            return u""
+
+        text = []
+        index = self._locate(start)
+        position = self._starts[index]
+        while position < end and index < len(self._pieces):
+            source, pieceStart, length = self._pieces[index]
+            text.append(source[pieceStart + max(start - position, 0):
+                               pieceStart + min(end - position, length)])
+            position += length
+            index += 1
+
+        return u"".join(text)
+
+    def splice(
+            self,
+            start,
+            end,
+            text):
+        """*replace a span of the buffer with new text*
+
+        **Key Arguments:**
+            - ``start`` -- the start of the span to replace
+            - ``end`` -- the end of the span to replace (``start`` to simply insert the text)
+            - ``text`` -- the replacement text (an empty string to delete the span)
+
+        **Return:**
+            - ``delta`` -- the change in length of the buffer
+
+        **Usage:**
+
+            .. code-block:: python
+
+                buffer.splice(8, 8, u" @due")
+        """
+        # CLAMP THE SPAN TO THE BUFFER, AS A STRING SLICE WOULD
+        start = max(0, min(start, self._length))
+        end = max(start, min(end, self._length))
+
+        first = self._split(start)
+        last = self._split(end)
+        newPieces = []
+        if len(text):
+            newPieces.append((text, 0, len(text)))
+        self._pieces[first:last] = newPieces
+
+        delta = len(text) - (end - start)
+        self._length += delta
+        self._starts = None
+        self._text = None
+
+        if len(self._pieces) > self.maxPieces:
+            unicode(self)
+
+        return delta
+
+    def splice_many(
+            self,
+            edits):
+        """*replace many spans of the buffer in a single pass over its pieces*
+
+        **Key Arguments:**
+            - ``edits`` -- a list of ``(start, end, text)`` edits (as for ``splice``). The spans refer to the buffer as it was before any of the edits and must not overlap.
+
+        **Return:**
+            - ``delta`` -- the change in length of the buffer
+
+        **Usage:**
+
+            .. code-block:: python
+
+                buffer.splice_many([(8, 8, u" @due"), (0, 0, u"project:\\n")])
+        """
+        oldPieces = self._pieces
+        pieces = []
+        index, used, position = 0, 0, 0
+        delta = 0
+        for start, end, text in sorted(edits):
+            start = max(position, min(start, self._length))
+            end = max(start, min(end, self._length))
+
+            # COPY THE PIECES UP TO THE START OF THE EDIT, THEN SKIP OVER THE
+            # PIECES IT REPLACES
+            for target, keep in ((start, True), (end, False)):
+                while position < target:
+                    source, pieceStart, length = oldPieces[index]
+                    step = min(length - used, target - position)
+                    if keep:
+                        pieces.append((source, pieceStart + used, step))
+                    used += step
+                    position += step
+                    if used == length:
+                        index += 1
+                        used = 0
+
+            if len(text):
+                pieces.append((text, 0, len(text)))
+            delta += len(text) - (end - start)
+
+        # COPY THE REMAINING PIECES
+        if index < len(oldPieces):
+            source, pieceStart, length = oldPieces[index]
+            pieces.append((source, pieceStart + used, length - used))
+            pieces.extend(oldPieces[index + 1:])
+
+        self._pieces = pieces
+        self._length += delta
+        self._starts = None
+        self._text = None
+
+        if len(self._pieces) > self.maxPieces:
+            unicode(self)
+
+        return delta
+
+    def write(
+            self,
+            writeFile):
+        """*stream the buffer to an open file without building the full string*
+
+        **Key Arguments:**
+            - ``writeFile`` -- the open file (or file-like object) to write to
+
+        **Usage:**
+
+            .. code-block:: python
+
+                writeFile = codecs.open(filepath, encoding='utf-8', mode='w')
+                buffer.write(writeFile)
+                writeFile.close()
+        """
+        if self._text is not None:
+            writeFile.write(self._text)
+            return None
+
+        for source, start, length in self._pieces:
+            writeFile.write(source[start:start + length])
+
+        return None
+
+    def _locate(
+            self,
+            position):
+        """*find the index of the piece containing a position in the buffer*
+
+        **Key Arguments:**
+            - ``position`` -- the position in the buffer
+
+        **Return:**
+            - ``index`` -- the index of the piece
+        """
+        if self._starts is None:
+            starts = []
+            total = 0
+            for source, start, length in self._pieces:
+                starts.append(total)
+                total += length
+            self._starts = starts
+
+        return max(bisect.bisect_right(self._starts, position) - 1, 0)
+
+    def _split(
+            self,
+            position):
+        """*make sure a piece boundary falls at a position in the buffer*
+
+        **Key Arguments:**
+            - ``position`` -- the position in the buffer
+
+        **Return:**
+            - ``index`` -- the index of the piece starting at the position
+        """
+        if position <= 0:
+            return 0
+        if position >= self._length:
+            return len(self._pieces)
+
+        index = self._locate(position)
+        offset = position - self._starts[index]
+        if offset == 0:
+            return index
+
+        source, start, length = self._pieces[index]
+        self._pieces[index:index + 1] = [
+            (source, start, offset), (source, start + offset, length - offset)]
+        self._starts.insert(index + 1, position)
+
+        return index + 1
@@ -13,9 +13,979 @@
 import sys
 import os
 import re
+import types
 import codecs
+import copy
+import hashlib
+import marshal
 import collections
+from StringIO import StringIO
+from contextlib import contextmanager
 from datetime import datetime, date, time
+from .commonutils.piecetable import piecetable
+from .commonutils.atomicfile import atomic_write
+
+# LINE PATTERNS USED BY THE PARSER - EACH IS ANCHORED TO A SINGLE
+# (DE-INDENTED) LINE OF A TASKPAPER DOCUMENT
+projectLineRegex = re.compile(
+    r'^(?P<title>(?!\[Searches\]|- )\S.*?:(?!\S)) *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+)?\s*$', re.UNICODE)
+taskLineRegex = re.compile(
+    r'^(?P<title>- ((?! @).)*)( *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+))?', re.UNICODE)
+noteLineRegex = re.compile(
+    r'^(?P<title>\S(?<!-)((?!(: +@|: *$)).)*)\s*$', re.UNICODE)
+searchesLineRegex = re.compile(
+    r'^(?P<title>\[Searches\]:) *(?P<tagString>( *?@\S*(\(.*?\))?)+)?', re.UNICODE)
+tagRegex = re.compile(r'@[^@]*', re.S)
+indentRegex = re.compile(r'^(?P<indent>\s+).*?$', re.UNICODE)
+
+# BUMP WHEN THE LAYOUT OF THE PARSED-TREE CACHE FILES CHANGES
+treeCacheVersion = 1
+nodeTypes = (None, "project", "task", "note", "searchBlock")
+
+
+def _parse_line(
+        text,
+        objectType=None):
+    """*match a single (de-indented) line of taskpaper text against the object line patterns*
+
+    **Key Arguments:**
+        - ``text`` -- the line to match, with its indentation removed
+        - ``objectType`` -- only try the pattern for this type of object [project|task|note|searchBlock]. Default *None* (try them all)
+
+    **Return:**
+        - ``objectType`` -- the type of object found on the line (``None`` if no pattern matched)
+        - ``titleEnd`` -- the end of the title within the line (the title always starts the line)
+        - ``tagStart`` -- the start of the tags within the line (``None`` if the line has no tags)
+        - ``tagEnd`` -- the end of the tags within the line
+    """
+    for thisType, regex in (("task", taskLineRegex), ("project", projectLineRegex), ("searchBlock", searchesLineRegex), ("note", noteLineRegex)):
+        if objectType and thisType != objectType:
+            continue
+        matchObject = regex.match(text)
+        if matchObject:
+            tagStart, tagEnd = None, None
+            if thisType != "note" and matchObject.group("tagString") is not None:
+                tagStart, tagEnd = matchObject.span("tagString")
+            return thisType, matchObject.end("title"), tagStart, tagEnd
+
+    return None, None, None, None
+
+
+class _node(object):
+    """
+    *A node of a parsed taskpaper tree*
+
+    Nodes hold no text of their own, only spans into the text buffer held by the root of their tree. The ``offset`` of the node's first line is measured from the start of its parent's body (the text following the parent's first line), ``length`` covers the whole subtree, ``lineLength`` the first line and ``indent`` that line's indentation. The title and tag spans are measured from the end of the indentation. Strings are only cut from the buffer when they are asked for.
+
+    **Key Arguments:**
+        - ``objectType`` -- the type of object [project|task|note|searchBlock] (``None`` for the root or unmatched lines)
+        - ``offset`` -- the offset of the node's first line
+        - ``lineLength`` -- the length of the node's first line
+        - ``indent`` -- the indentation of the node's first line
+        - ``titleEnd`` -- the end of the title. Default *None*
+        - ``tagStart`` -- the start of the tags. Default *None*
+        - ``tagEnd`` -- the end of the tags. Default *None*
+        - ``parent`` -- the parent node. Default *None*
+    """
+    __slots__ = ("type", "offset", "length", "lineLength", "indent", "titleEnd",
+                 "tagStart", "tagEnd", "children", "parent", "generation")
+
+    def __init__(
+            self,
+            objectType,
+            offset,
+            lineLength,
+            indent,
+            titleEnd=None,
+            tagStart=None,
+            tagEnd=None,
+            parent=None):
+        self.type = objectType
+        self.offset = offset
+        self.length = None
+        self.lineLength = lineLength
+        self.indent = indent
+        self.titleEnd = titleEnd
+        self.tagStart = tagStart
+        self.tagEnd = tagEnd
+        self.children = []
+        self.parent = parent
+        self.generation = 0
+
+    def _line_slice(
+            self,
+            lineStart,
+            lineEnd):
+        """*cut a span of the node's first line (measured from the end of its indentation) from the text buffer*"""
+        root = _node_root(self)
+        if root.pendingLines and self in root.pendingLines:
+            return root.pendingLines[self][lineStart:lineEnd]
+        start = _node_start(self) + self.indent
+        return root.buffer[start + lineStart:start + lineEnd]
+
+    @property
+    def title(
+            self):
+        """*the title of the node, cut from the text buffer*"""
+        if self.titleEnd is None:
+            return None
+        return self._line_slice(0, self.titleEnd)
+
+    @property
+    def tagString(
+            self):
+        """*the tags of the node as a string, cut from the text buffer*"""
+        if self.tagStart is None:
+            return None
+        return self._line_slice(self.tagStart, self.tagEnd)
+
+
+class _rootNode(_node):
+    """
+    *The root node of a parsed taskpaper tree, holding the text buffer the spans of the tree refer to*
+
+    The root also holds the tree's ``tagIndex`` and ``titleIndex`` (see ``_index_nodes``), built the first time the tree is searched by tag or title.
+
+    While the document is in a batch of edits (see ``document.batch``) the root's ``pendingLines`` maps each node with an edited first line to the new text of the line (without indentation). The new lines are only written to the buffer when the batch ends (see ``_apply_line_edits``).
+
+    **Key Arguments:**
+        - ``buffer`` -- the text buffer (a ``piecetable``)
+    """
+    __slots__ = ("buffer", "tagIndex", "titleIndex", "pendingLines")
+
+    def __init__(
+            self,
+            buffer):
+        _node.__init__(self, None, 0, -1, -1)
+        self.length = len(buffer)
+        self.buffer = buffer
+        self.tagIndex = None
+        self.titleIndex = None
+        self.pendingLines = None
+
+
+def _parse_taskpaper(
+        content,
+        nested=False):
+    """*parse taskpaper text into a tree of project, task, note and search-block nodes*
+
+    The text is read line-by-line exactly once. The indentation of each line is compared against a stack of the currently open nodes to find its parent, so the whole tree is built in a single pass however deeply it is nested.
+
+    Nodes do not hold copies of the text, only spans into the buffer held by the root (see ``_node``). As offsets are relative to the parent, an edit only has to shift the spans of the nodes that follow it along its own ancestry (see ``_resize_node``).
+
+    **Key Arguments:**
+        - ``content`` -- the taskpaper text to parse
+        - ``nested`` -- the text is a fragment cut from within a document, so its top-level objects may be indented. Default *False*
+
+    **Return:**
+        - ``root`` -- the root node of the tree. The root also holds the ``buffer`` of text the spans refer to (a ``piecetable``).
+    """
+    length = len(content)
+    root = _rootNode(piecetable(content))
+    # A STACK OF THE OPEN NODES AND THE ABSOLUTE START OF THEIR FIRST LINES
+    stack = [(root, 0)]
+
+    position = 0
+    while position < length:
+        lineStart = position
+        lineEnd = content.find("\n", position)
+        if lineEnd == -1:
+            lineEnd = length
+        position = lineEnd + 1
+        line = content[lineStart:lineEnd]
+        text = line.lstrip()
+        if not len(text.strip()):
+            continue
+        indent = len(line) - len(text)
+
+        # CLOSE ALL NODES THAT THIS LINE IS NOT NESTED WITHIN
+        while stack[-1][0].indent >= indent:
+            node, start = stack.pop()
+            node.length = lineStart - start
+        parent, parentStart = stack[-1]
+
+        # INDENTED TEXT AT THE ROOT OF A DOCUMENT BELONGS TO NO OBJECT
+        objectType, titleEnd, tagStart, tagEnd = None, None, None, None
+        if parent is not root or indent == 0 or nested:
+            objectType, titleEnd, tagStart, tagEnd = _parse_line(text)
+
+        node = _node(
+            objectType,
+            lineStart - (parentStart + parent.lineLength + 1),
+            lineEnd - lineStart,
+            indent,
+            titleEnd,
+            tagStart,
+            tagEnd,
+            parent
+        )
+        parent.children.append(node)
+        stack.append((node, lineStart))
+
+    while len(stack) > 1:
+        node, start = stack.pop()
+        node.length = length - start
+
+    return root
+
+
+def _node_root(
+        node):
+    """*walk up the tree to find the root node (and so the text buffer) of a node*
+
+    **Key Arguments:**
+        - ``node`` -- the parsed node
+
+    **Return:**
+        - ``root`` -- the root node of the tree
+    """
+    while node.parent is not None:
+        node = node.parent
+    return node
+
+
+def _tree_cache_path(
+        cacheDir,
+        filepath):
+    """*the path of the cache file holding the parsed tree of a taskpaper file*
+
+    **Key Arguments:**
+        - ``cacheDir`` -- the directory of the parsed-tree cache
+        - ``filepath`` -- the path to the taskpaper file
+
+    **Return:**
+        - ``cachePath`` -- the path to the cache file
+    """
+    filepath = os.path.abspath(filepath)
+    if isinstance(filepath, unicode):
+        filepath = filepath.encode("utf-8")
+    return os.path.join(os.path.expanduser(cacheDir), hashlib.sha1(filepath).hexdigest() + ".tree")
+
+
+def _read_tree_cache(
+        cacheDir,
+        filepath,
+        saved,
+        buffer):
+    """*rebuild the parsed tree of a taskpaper file from the cache, if the cache is still good for the file*
+
+    **Key Arguments:**
+        - ``cacheDir`` -- the directory of the parsed-tree cache
+        - ``filepath`` -- the path to the taskpaper file
+        - ``saved`` -- the ``(filepath, signature, textHash)`` of the text just read from the file
+        - ``buffer`` -- the text buffer (a ``piecetable``) to build the tree on
+
+    **Return:**
+        - ``root`` -- the root node of the tree, or ``None`` if the file is not cached (or has changed since)
+    """
+    try:
+        with open(_tree_cache_path(cacheDir, filepath), "rb") as readFile:
+            version, signature, textHash, flatNodes = marshal.load(readFile)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+    if (version, signature, textHash) != (treeCacheVersion, saved[1], saved[2]):
+        return None
+
+    # EACH NODE IS 9 VALUES: ITS TYPE, SPANS AND THE INDEX OF ITS PARENT
+    root = _rootNode(buffer)
+    nodes = [root]
+    for i in xrange(0, len(flatNodes), 9):
+        objectType, offset, length, lineLength, indent, titleEnd, tagStart, tagEnd, parentIndex = flatNodes[
+            i:i + 9]
+        parent = nodes[parentIndex]
+        node = _node(nodeTypes[objectType], offset, lineLength, indent,
+                     titleEnd, tagStart, tagEnd, parent)
+        node.length = length
+        parent.children.append(node)
+        nodes.append(node)
+
+    return root
+
+
+def _write_tree_cache(
+        cacheDir,
+        filepath,
+        saved,
+        root):
+    """*write the parsed tree of a taskpaper file to the cache*
+
+    The cache is a convenience only, so a cache that can not be written is simply skipped.
+
+    **Key Arguments:**
+        - ``cacheDir`` -- the directory of the parsed-tree cache
+        - ``filepath`` -- the path to the taskpaper file
+        - ``saved`` -- the ``(filepath, signature, textHash)`` of the file's current text
+        - ``root`` -- the root node of the tree (which must match the file's current text)
+    """
+    if saved[1] is None:
+        return None
+
+    flatNodes = []
+    indexes = {root: 0}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for child in node.children:
+            indexes[child] = len(indexes)
+            flatNodes.extend((nodeTypes.index(child.type), child.offset, child.length, child.lineLength,
+                              child.indent, child.titleEnd, child.tagStart, child.tagEnd, indexes[node]))
+        stack.extend(reversed(node.children))
+
+    cachePath = _tree_cache_path(cacheDir, filepath)
+    data = marshal.dumps(
+        (treeCacheVersion, saved[1], saved[2], tuple(flatNodes)))
+    try:
+        if not os.path.exists(os.path.dirname(cachePath)):
+            os.makedirs(os.path.dirname(cachePath))
+        atomic_write(cachePath, lambda writeFile: writeFile.write(
+            data), encoding=None)
+    except (IOError, OSError):
+        pass
+
+    return None
+
+
+def _copy_tree(
+        root):
+    """*copy a parsed tree onto a buffer of its own, so the copy can be edited without touching the original*
+
+    The copy is built from the spans of the existing nodes, so the text is not parsed again.
+
+    **Key Arguments:**
+        - ``root`` -- the root node of the tree (with no edits held back by a batch)
+
+    **Return:**
+        - ``rootCopy`` -- the root node of the copy
+    """
+    rootCopy = _rootNode(piecetable(unicode(root.buffer)))
+    stack = [(root, rootCopy)]
+    while stack:
+        node, nodeCopy = stack.pop()
+        for child in node.children:
+            childCopy = _node(child.type, child.offset, child.lineLength, child.indent,
+                              child.titleEnd, child.tagStart, child.tagEnd, nodeCopy)
+            childCopy.length = child.length
+            nodeCopy.children.append(childCopy)
+            stack.append((child, childCopy))
+
+    return rootCopy
+
+
+def _node_start(
+        node):
+    """*find the absolute position of a node's first line within its root's text buffer*
+
+    **Key Arguments:**
+        - ``node`` -- the parsed node
+
+    **Return:**
+        - ``start`` -- the position of the start of the node's first line
+    """
+    start = 0
+    while node.parent is not None:
+        parent = node.parent
+        start += parent.lineLength + 1 + node.offset
+        node = parent
+    return start
+
+
+def _child_index(
+        parent,
+        node):
+    """*find the index of a node within its parent's list of children*
+
+    **Key Arguments:**
+        - ``parent`` -- the parent node
+        - ``node`` -- the child node
+
+    **Return:**
+        - ``index`` -- the index of the child (``None`` if the node is no longer a child of the parent)
+    """
+    for index, child in enumerate(parent.children):
+        if child is node:
+            return index
+    return None
+
+
+def _resize_node(
+        node,
+        delta,
+        childIndex=None):
+    """*update the spans of the tree after the text within a node has grown or shrunk*
+
+    The node and each of its ancestors grow by ``delta`` characters and every node following them (along with the node's own children from ``childIndex`` onwards) is shifted along. Nodes elsewhere in the tree are untouched, as their offsets are relative to their parents.
+
+    **Key Arguments:**
+        - ``node`` -- the node containing the edit
+        - ``delta`` -- the change in length of the text
+        - ``childIndex`` -- the index of the first of the node's own children to shift. Default *None* (no children follow the edit)
+    """
+    if childIndex is not None:
+        for child in node.children[childIndex:]:
+            child.offset += delta
+
+    while node is not None:
+        node.length += delta
+        parent = node.parent
+        if parent is not None:
+            index = _child_index(parent, node)
+            for sibling in parent.children[index + 1:]:
+                sibling.offset += delta
+        node = parent
+
+    return None
+
+
+def _splice_text(
+        root,
+        start,
+        end,
+        text):
+    """*replace a span of a tree's text buffer*
+
+    **Key Arguments:**
+        - ``root`` -- the root node holding the text buffer
+        - ``start`` -- the start of the span to replace
+        - ``end`` -- the end of the span to replace
+        - ``text`` -- the replacement text
+
+    **Return:**
+        - ``delta`` -- the change in length of the buffer
+    """
+    return root.buffer.splice(start, end, text)
+
+
+def _tag_list(
+        tagString):
+    """*split a string of tags into a list of tags (without the @)*
+
+    **Key Arguments:**
+        - ``tagString`` -- the tags of an object, as a string
+
+    **Return:**
+        - ``tags`` -- the list of tags
+    """
+    tags = []
+    if tagString:
+        matchList = tagRegex.findall(tagString)
+        for m in matchList:
+            tags.append(m.strip().replace("@", ""))
+
+    return tags
+
+
+def _project_path(
+        node):
+    """*build the path of a project from the titles of the projects it is nested within, e.g. ``parent project / child-project``*
+
+    This is the form of path TaskPaper uses in the ``@project(...)`` tags of archived tasks.
+
+    **Key Arguments:**
+        - ``node`` -- the project node
+
+    **Return:**
+        - ``path`` -- the path of the project (``None`` if the project is not nested within projects alone)
+    """
+    titles = []
+    while node.parent is not None:
+        if node.type != "project":
+            return None
+        titles.append(node.title[:-1])
+        node = node.parent
+
+    return " / ".join(reversed(titles))
+
+
+def _index_nodes(
+        root,
+        node,
+        add=True,
+        recursive=True):
+    """*add (or remove) a node and all of its descendants to (or from) the tag and title indexes of a tree*
+
+    The ``tagIndex`` maps each tag to the set of project and task nodes carrying it. A tag with an attribute is indexed both by its bare name and in full (``due`` and ``due(today)``). The ``titleIndex`` maps the title of each project and task, and the path of each project (see ``_project_path``), to the set of nodes with that title or path. All keys are lower-case and a key may map to many nodes: duplicates are left for the lookups to resolve. Nothing is done if the indexes have not yet been built.
+
+    **Key Arguments:**
+        - ``root`` -- the root node of the tree holding the indexes
+        - ``node`` -- the node to (un)index
+        - ``add`` -- add the nodes to the indexes. Default *True* (``False`` to remove them)
+        - ``recursive`` -- also (un)index the node's descendants. Default *True*
+    """
+    if root.tagIndex is None:
+        return None
+
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if recursive:
+            stack.extend(node.children)
+        if node.type not in ("project", "task"):
+            continue
+
+        keys = []
+        for tag in _tag_list(node.tagString):
+            tag = tag.lower()
+            keys += [(root.tagIndex, tag), (root.tagIndex, tag.split("(")[0])]
+        keys.append((root.titleIndex, node.title.lower()))
+        if node.type == "project":
+            path = _project_path(node)
+            if path is not None:
+                keys.append((root.titleIndex, path.lower()))
+
+        for index, key in keys:
+            if add:
+                index.setdefault(key, set()).add(node)
+            elif key in index:
+                index[key].discard(node)
+
+    return None
+
+
+def _indexed_nodes(
+        node,
+        index,
+        keys,
+        objectType,
+        nearestFirst=False):
+    """*use one of the indexes of a tree to find the project or task nodes nested within a node*
+
+    Only nodes that are reached by recursing through the nested objects are returned (projects are found within projects, tasks within projects and tasks). They are returned in the order a recursive search would find them: an object's tasks (each followed by its own sub-tasks) then its projects or, with ``nearestFirst``, all of an object's direct children before anything nested deeper within them.
+
+    **Key Arguments:**
+        - ``node`` -- the node to search within
+        - ``index`` -- the index to search [tags|titles]
+        - ``keys`` -- the lower-case keys to look up
+        - ``objectType`` -- the type of node to return [project|task]
+        - ``nearestFirst`` -- order the nodes as ``get_project`` and ``get_task`` search. Default *False* (the order of ``tagged_projects`` and ``tagged_tasks``)
+
+    **Return:**
+        - ``matches`` -- a list of the paths from ``node`` to each matching node (each a list of nodes, starting with a child of ``node``)
+    """
+    root = _node_root(node)
+    if root.tagIndex is None:
+        root.tagIndex = {}
+        root.titleIndex = {}
+        _index_nodes(root, root)
+    index = {"tags": root.tagIndex, "titles": root.titleIndex}[index]
+
+    candidates = set()
+    for key in keys:
+        candidates.update(index.get(key, ()))
+
+    rank = {"task": 0, "project": 1}
+    matches = []
+    for match in candidates:
+        if match.type != objectType or match is node:
+            continue
+
+        # WALK UP TO THE NODE THROUGH PROJECTS AND TASKS ONLY
+        path = []
+        step = match
+        while step is not None and step is not node:
+            if step.type not in rank:
+                break
+            path.append(step)
+            step = step.parent
+        if step is not node:
+            continue
+
+        # A RECURSIVE SEARCH NEVER LOOKS FOR PROJECTS WITHIN A TASK
+        path.reverse()
+        pathTypes = [node.type] + [p.type for p in path]
+        if "task" in pathTypes and "project" in pathTypes[pathTypes.index("task"):]:
+            continue
+        matches.append(path)
+
+    # SORT THE MATCHES INTO THE ORDER A RECURSIVE SEARCH WOULD FIND THEM
+    if nearestFirst:
+        matches.sort(key=lambda path: [(rank[p.type] + 1, p.offset)
+                                       for p in path[:-1]] + [(0, path[-1].offset)])
+    else:
+        matches.sort(key=lambda path: [(rank[p.type], p.offset) for p in path])
+
+    return matches
+
+
+def _node_keys(
+        node):
+    """*record what each node in a subtree holds, before its text is rewritten*
+
+    **Key Arguments:**
+        - ``node`` -- the top node of the subtree
+
+    **Return:**
+        - ``keys`` -- a dictionary mapping each node in the subtree to its key (type, title and tags) and the position of its first line relative to the start of the subtree
+    """
+    keys = {}
+    stack = [(node, 0)]
+    while stack:
+        node, start = stack.pop()
+        title = node.title
+        if title is not None:
+            title = title.strip()
+        keys[node] = ((node.type, title, tuple(_tag_list(node.tagString))), start)
+        bodyStart = start + node.lineLength + 1
+        for child in node.children:
+            stack.append((child, bodyStart + child.offset))
+
+    return keys
+
+
+def _adopt_nodes(
+        node,
+        newNode,
+        keys,
+        oldText):
+    """*move the spans of a freshly parsed subtree onto the existing nodes of the subtree it replaces*
+
+    Used when an object is rewritten (sorted or tidied) or a document is re-parsed, so the nodes behind objects already handed out keep their identity. Each new child is matched to an old child of the same type, title and tags (children with the same key are matched in turn, so duplicates keep their order). New nodes without a match are used as they are, and old nodes left without a match are detached from the tree.
+
+    **Key Arguments:**
+        - ``node`` -- the existing node
+        - ``newNode`` -- the new node parsed from the rewritten text
+        - ``keys`` -- the keys of the old subtree, recorded before it was rewritten (see ``_node_keys``)
+        - ``oldText`` -- the text of the old subtree
+    """
+    stack = [(node, newNode)]
+    while stack:
+        node, newNode = stack.pop()
+        node.length = newNode.length
+        node.lineLength = newNode.lineLength
+        node.indent = newNode.indent
+        node.titleEnd = newNode.titleEnd
+        node.tagStart = newNode.tagStart
+        node.tagEnd = newNode.tagEnd
+
+        available = {}
+        for child in node.children:
+            available.setdefault(keys[child][0], []).append(child)
+
+        children = []
+        for newChild in newNode.children:
+            title = newChild.title
+            if title is not None:
+                title = title.strip()
+            matches = available.get(
+                (newChild.type, title, tuple(_tag_list(newChild.tagString))))
+            if matches:
+                child = matches.pop(0)
+                child.offset = newChild.offset
+                stack.append((child, newChild))
+            else:
+                child = newChild
+            children.append(child)
+
+        for leftovers in available.values():
+            for child in leftovers:
+                start = keys[child][1]
+                _detach_node(child, oldText[start:start + child.length])
+        for child in children:
+            child.parent = node
+        node.children = children
+
+    return None
+
+
+def _detach_node(
+        node,
+        text):
+    """*give a node that has been cut out of its tree a root of its own*
+
+    Objects built from the node may still be held elsewhere, so the node keeps a copy of its text rather than pointing at spans of a buffer that no longer contains it.
+
+    **Key Arguments:**
+        - ``node`` -- the node that has been removed from its parent's children
+        - ``text`` -- the text of the node's subtree, as it was cut from the buffer
+    """
+    root = _rootNode(piecetable(text))
+    root.children.append(node)
+    node.parent = root
+    node.offset = 0
+
+    return None
+
+
+def _apply_line_edits(
+        root):
+    """*write the pending first-line edits of a batch into a tree's text buffer in a single pass*
+
+    All of the edited lines are spliced into the buffer at once, then the spans of the edited nodes, their ancestors and the siblings that follow them are updated in one pass over the tree.
+
+    **Key Arguments:**
+        - ``root`` -- the root node holding the text buffer and the pending edits
+
+    **Return:**
+        - ``edited`` -- the list of nodes whose first lines were rewritten
+    """
+    pendingLines = root.pendingLines
+    if not pendingLines:
+        return []
+    root.pendingLines = {}
+
+    # FIND THE SPANS OF ALL THE EDITED LINES BEFORE ANY OF THEM ARE CHANGED
+    edits = []
+    for node, line in pendingLines.items():
+        start = _node_start(node)
+        edits.append((start + node.indent, start + node.lineLength, line))
+
+    growth = {}
+    for node, line in pendingLines.items():
+        delta = len(line) - (node.lineLength - node.indent)
+        node.lineLength += delta
+        ancestor = node
+        while ancestor is not None:
+            growth[ancestor] = growth.get(ancestor, 0) + delta
+            ancestor = ancestor.parent
+    root.buffer.splice_many(edits)
+
+    # GROW THE EDITED SUBTREES AND SHIFT THE CHILDREN FOLLOWING THEM
+    parents = set()
+    for node, delta in growth.items():
+        node.length += delta
+        if node.parent is not None:
+            parents.add(node.parent)
+    for parent in parents:
+        shift = 0
+        for child in parent.children:
+            child.offset += shift
+            shift += growth.get(child, 0)
+
+    return pendingLines.keys()
+
+
+def _workflow_ranks(
+        workflowTags):
+    """*compile a list of workflow tags into a lookup of the rank of each tag*
+
+    **Key Arguments:**
+        - ``workflowTags`` -- a string of space/comma separated tags, or a list of tags
+
+    **Return:**
+        - ``ranks`` -- a tuple of two dictionaries mapping lower-case tags to their rank: one for tags given with an attribute (matched in full, e.g. ``due(today)``) and one for bare tags (matched by name alone). Tags not in the list rank after all of these.
+    """
+    if not isinstance(workflowTags, list):
+        workflowTags = workflowTags.strip().replace(
+            ",", "").replace("@", "").split(" ")
+    else:
+        workflowTags = [l.replace("@", "") for l in workflowTags]
+
+    fullTags = {}
+    bareTags = {}
+    rank = 0
+    for wt in workflowTags:
+        wt = wt.lower()
+        if wt in fullTags or wt in bareTags:
+            continue
+        if "(" in wt:
+            fullTags[wt] = rank
+        else:
+            bareTags[wt] = rank
+        rank += 1
+
+    return fullTags, bareTags
+
+
+def _workflow_rank(
+        node,
+        ranks):
+    """*find the rank of a project or task node in a workflow (see ``_workflow_ranks``)*
+
+    The node is ranked by the first of its tags found in the workflow.
+
+    **Key Arguments:**
+        - ``node`` -- the project or task node
+        - ``ranks`` -- the compiled workflow ranks
+
+    **Return:**
+        - ``rank`` -- the rank of the node
+    """
+    fullTags, bareTags = ranks
+    for tag in _tag_list(node.tagString):
+        tag = tag.lower()
+        rank = min(fullTags.get(tag, len(fullTags) + len(bareTags)),
+                   bareTags.get(tag.split("(")[0], len(fullTags) + len(bareTags)))
+        if rank < len(fullTags) + len(bareTags):
+            return rank
+
+    return len(fullTags) + len(bareTags)
+
+
+def _sort_nodes(
+        node,
+        objectTypes,
+        ranks):
+    """*reorder the projects and/or tasks nested within a node by their workflow rank*
+
+    The children are reordered in place (the sort is stable, so objects of the same rank keep their order) and their spans are left untouched: the node must be rewritten afterwards to bring the text into the new order. Nodes are visited as a recursive sort would visit them: projects and tasks within projects, and tasks within tasks.
+
+    **Key Arguments:**
+        - ``node`` -- the node to sort within
+        - ``objectTypes`` -- the types of object to reorder (a list containing "project" and/or "task")
+        - ``ranks`` -- the compiled workflow ranks (see ``_workflow_ranks``)
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        children = node.children[:]
+        for objectType in objectTypes:
+            slots = [i for i, c in enumerate(children) if c.type == objectType]
+            ordered = sorted([children[i] for i in slots],
+                             key=lambda c: _workflow_rank(c, ranks))
+            for i, child in zip(slots, ordered):
+                children[i] = child
+        node.children = children
+
+        for child in children:
+            if child.type == "project" and node.type != "task":
+                stack.append(child)
+            elif child.type == "task" and "task" in objectTypes:
+                stack.append(child)
+
+    return None
+
+
+def _terminate_text(
+        root):
+    """*make sure the final line of a tree's text ends with a newline, so more lines can be appended after it*
+
+    **Key Arguments:**
+        - ``root`` -- the root node holding the text buffer
+    """
+    buffer = root.buffer
+    if not len(buffer) or buffer[-1] == "\n":
+        return None
+
+    _splice_text(root, len(buffer), len(buffer), "\n")
+    node = root
+    while len(node.children):
+        node = node.children[-1]
+    _resize_node(node, 1)
+
+    return None
+
+
+def _unterminate_text(
+        root):
+    """*remove the trailing newline from the final line of a tree's text*
+
+    **Key Arguments:**
+        - ``root`` -- the root node holding the text buffer
+    """
+    buffer = root.buffer
+    if not len(buffer) or buffer[-1] != "\n":
+        return None
+
+    _splice_text(root, len(buffer) - 1, len(buffer), "")
+    node = root
+    while len(node.children):
+        node = node.children[-1]
+    _resize_node(node, -1)
+
+    return None
+
+
+def _text_hash(
+        text):
+    """*hash the utf-8 encoding of some text*
+
+    **Key Arguments:**
+        - ``text`` -- the text to hash, a string or a ``piecetable`` (which is hashed piece-by-piece, without building the full string)
+
+    **Return:**
+        - ``textHash`` -- the hex digest of the text
+    """
+    textHash = hashlib.sha1()
+
+    class hashSink(object):
+
+        def write(self, chunk):
+            textHash.update(chunk.encode("utf-8"))
+
+    if isinstance(text, piecetable):
+        text.write(hashSink())
+    else:
+        hashSink().write(text)
+
+    return textHash.hexdigest()
+
+
+def _file_signature(
+        filepath):
+    """*the size and modification time of a file*
+
+    **Key Arguments:**
+        - ``filepath`` -- the path to the file
+
+    **Return:**
+        - ``signature`` -- a ``(size, mtime)`` tuple, or ``None`` if there is no file at the path
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+
+    return stat.st_size, stat.st_mtime
+
+
+class _textWriter(object):
+    """
+    *Write the text of taskpaper objects to a file-like sink, trimming whitespace from the ends of each object as it goes*
+
+    Whitespace is held back until it is followed by more text, so the whitespace trailing an object can be dropped when the object ends (see ``begin`` and ``end``) without ever having to take back text that has already been written. Whitespace leading the very first text written is dropped too.
+
+    **Key Arguments:**
+        - ``sink`` -- the sink to write to (anything with a ``write`` method)
+    """
+
+    def __init__(
+            self,
+            sink):
+        self.sink = sink
+        self.held = ""
+        self.flushes = 0
+        self.started = False
+
+    def write(
+            self,
+            text):
+        """*write a chunk of text to the sink, holding back any trailing whitespace*"""
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return None
+            self.started = True
+
+        body = text.rstrip()
+        if not body:
+            self.held += text
+            return None
+
+        if self.held:
+            self.sink.write(self.held)
+        self.sink.write(body)
+        self.held = text[len(body):]
+        self.flushes += 1
+        return None
+
+    def begin(
+            self):
+        """*mark the start of an object*
+
+        **Return:**
+            - ``mark`` -- the mark to hand to ``end`` once the object is written
+        """
+        return self.flushes, len(self.held)
+
+    def end(
+            self,
+            mark):
+        """*mark the end of an object, dropping any whitespace written since it began*"""
+        flushes, held = mark
+        if flushes == self.flushes:
+            self.held = self.held[:held]
+        else:
+            self.held = ""
+        return None
 
 
 class baseClass():
@@ -23,14 +993,12 @@ class baseClass():
     *This is the base class for all taskpaper objects: documents, projects and tasks*
 
     **Key Arguments:**
-        - ``matchObject`` -- a dictionary containing the constituent parts of the object
+        - ``matchObject`` -- the parsed node of the object (see ``_node``)
         - ``parentObject`` -- the parent object containing this taskpaper object. Default *None*
     """
 
     def __init__(self, matchObject, parentObject=None):
         self.meta = matchObject
-        if self.meta["content"] == None:
-            self.meta["content"] = ""
         self.parent = parentObject
 
     @property
@@ -48,7 +1016,10 @@ class baseClass():
                 print note.raw_content
                 print task.raw_content
         """
-        return self.meta["raw_content"]
+        self._get_document()._flush_edits()
+        node = self.meta
+        start = _node_start(node)
+        return _node_root(node).buffer[start + node.indent:start + node.length]
 
     @property
     def projects(self):
@@ -70,8 +1041,6 @@ class baseClass():
                 subProjects = aProject.projects
         """
         return self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>(?!\[Searches\]|- )\S.*?:(?!\S)) *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+)?(?P<content>(\n(( |\t)+\S.*)|\n( |\t)*|\n)+)', re.UNICODE),
             objectType="project",
             content=None
         )
@@ -96,8 +1065,6 @@ class baseClass():
                 aTasks.tasks
         """
         return self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>- ((?! @).)*)( *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+))?(?P<content>(\n(( |\t)+\S.*)|\n( |\t)*)*)', re.UNICODE),
             objectType="task",
             content=None
         )
@@ -116,30 +1083,36 @@ class baseClass():
                 pContent = aProject.content
                 tContent = aTask.content
         """
-        reIndent = re.compile(r'^(?P<indent>\s+).*?$', re.UNICODE)
-
         cleanedContent = ""
-        replaceContent = ""
+
+        # NOTES HAVE NO CONTENT BEYOND THEIR TITLE
+        node = self.meta
+        if node.type == "note":
+            return cleanedContent
+
+        # THE CONTENT IS THE TEXT FOLLOWING THE FIRST LINE OF THE OBJECT
+        self._get_document()._flush_edits()
+        start = _node_start(node)
+        content = _node_root(node).buffer[
+            start + node.lineLength + 1:start + node.length]
 
         # FIND THE SMALLEST INDENT LEVEL IN THE CONTENT
         lowestIndent = "\t" * 10
-        for line in self.meta["content"].split("\n"):
+        for line in content.split("\n"):
             if len(line.strip()) == 0:
                 continue
-            matchObject = reIndent.match(line)
+            matchObject = indentRegex.match(line)
             if matchObject:
                 indent = matchObject.group("indent")
                 if len(indent) < len(lowestIndent):
                     lowestIndent = indent
 
         # STRIP OFF THE SMALLEST INDENT LEVEL FROM CONTENT
-        for line in self.meta["content"].split("\n"):
+        for line in content.split("\n"):
             if len(line.strip()) == 0:
                 continue
             cleanedContent += line[len(lowestIndent):] + "\n"
-            replaceContent += line + "\n"
 
-        self.meta["content"] = replaceContent[:-1]
         return cleanedContent[:-1]
 
     @property
@@ -156,7 +1129,7 @@ class baseClass():
                 aNote.title
         """
 
-        return self.meta["title"]
+        return self.meta.title
 
     @property
     def tags(
@@ -176,14 +1149,7 @@ class baseClass():
                 > ['flag', 'home(bathroom)']
         """
 
-        tags = []
-        regex = re.compile(r'@[^@]*', re.S)
-        if self.meta["tagString"]:
-            matchList = regex.findall(self.meta["tagString"])
-            for m in matchList:
-                tags.append(m.strip().replace("@", ""))
-
-        return tags
+        return _tag_list(self.meta.tagString)
 
     @property
     def notes(self):
@@ -200,8 +1166,6 @@ class baseClass():
                 taskNotes = aTask.notes
         """
         return self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>\S(?<!-)((?!(: +@|: *\n|: *$)).)*)\s*?(\n|$)(?P<tagString>&&&)?(?P<content>&&&)?', re.UNICODE),
             objectType="note",
             content=None
         )
@@ -232,85 +1196,83 @@ class baseClass():
 
     def get_project(
             self,
-            projectName):
+            projectName,
+            allMatches=False):
         """*recursively scan this taskpaper object to find a descendant project by name*
 
+        Projects are looked up in the document's title index. The project's direct sub-projects are searched before those nested more deeply within them. A project can also be found by its path (e.g. ``parent project / child-project``, as used in the ``@project(...)`` tags of archived tasks).
+
         **Key Arguments:**
             - ``projectName`` -- the name, or title, of the project you want to return
+            - ``allMatches`` -- return a list of every project matching the name, rather than the first one found. Default *False*
 
         **Return:**
-            - ``project`` -- the taskpaper project object you requested (or ``None`` if no project was matched)
+            - ``project`` -- the taskpaper project object you requested (or ``None`` if no project was matched). A list of projects if ``allMatches`` is *True*.
 
         **Usage:**
 
             .. code-block:: python
 
                 archiveProject = doc.get_project("Archive")
+                coffeeProject = doc.get_project("parent project / make coffee")
+
+            Several projects may share a title. To get all of them use:
+
+            .. code-block:: python
+
+                archiveProjects = doc.get_project("Archive", allMatches=True)
         """
 
         if projectName[-1] != ":":
             projectName += ":"
-        project = None
-        for p in self.projects:
-            if p.title.lower() == projectName.lower():
-                project = p
-                break
-
-        if project == None:
-            for p in self.projects:
-                project = p.get_project(projectName)
-                if project:
-                    break
-
-        return project
+        keys = [projectName.lower(), projectName[:-1].lower()]
+        projectList = [self._get_descendant(path) for path in _indexed_nodes(
+            self.meta, "titles", keys, "project", nearestFirst=True)]
+
+        if allMatches:
+            return projectList
+        if len(projectList):
+            return projectList[0]
+        return None
 
     def get_task(
             self,
-            taskName):
+            taskName,
+            allMatches=False):
         """*recursively scan this taskpaper object to find a descendant task by name*
 
+        Tasks are looked up in the document's title index. The object's direct tasks are searched first, then the tasks nested within them and finally the tasks within its projects.
+
         **Key Arguments:**
             - ``taskName`` -- the name, or title, of the task you want to return
+            - ``allMatches`` -- return a list of every task matching the name, rather than the first one found. Default *False*
 
         **Return:**
-            - ``task`` -- the taskpaper task object you requested (or ``None`` if no task was matched)
+            - ``task`` -- the taskpaper task object you requested (or ``None`` if no task was matched). A list of tasks if ``allMatches`` is *True*.
 
         **Usage:**
 
             .. code-block:: python
 
                 aTask = doc.get_task("cut the grass")
+                allTasks = doc.get_task("cut the grass", allMatches=True)
         """
 
         if taskName[:2] != "- ":
             taskName = "- " + taskName
-        task = None
         try:
             self.refresh
         except:
             pass
 
-        # SEARCH TASKS
-        for t in self.tasks:
-            if t.title.lower() == taskName.lower() and task == None:
-                task = t
-                break
-
-        # SEARCH TASK CONTENTS
-        if task == None:
-            for t in self.tasks:
-                task = t.get_task(taskName)
-                if task:
-                    break
-
-        # SEARCH PROJECT CONTENTS
-        if task == None and "<Task " not in self.__repr__():
-            for p in self.projects:
-                task = p.get_task(taskName)
-                if task:
-                    break
+        taskList = [self._get_descendant(path) for path in _indexed_nodes(
+            self.meta, "titles", [taskName.lower()], "task", nearestFirst=True)]
 
-        return task
+        if allMatches:
+            return taskList
+        if len(taskList):
+            return taskList[0]
+        return None
 
     def to_string(
             self,
@@ -319,7 +1281,8 @@ class baseClass():
             tags=None,
             projects=None,
             tasks=None,
-            notes=None):
+            notes=None,
+            retag=None):
         """*convert this taskpaper object to a string*
 
         **Key Arguments:**
@@ -328,7 +1291,8 @@ class baseClass():
             - ``tags`` -- replace tags with these tags. Default *None*
             - ``projects`` -- replace projects with these projects, pass empty list to delete all projects. Default *None*
             - ``tasks`` -- replace tasks with these ones, pass empty list to delete all tasks. Default *None*
-            - ``notes`` -- replace notes with these ones, pass empty list to delete all notes. Default *None*
+            - ``notes`` -- replace notes with these ones (note objects or strings), pass empty list to delete all notes. Default *None*
+            - ``retag`` -- a function given the list of tags of each task written (this object included), returning the tags to write in their place. The tasks themselves are left untouched. Default *None*
 
         **Return:**
             - ``objectString`` -- the taskpaper object as a string
@@ -349,61 +1313,122 @@ class baseClass():
                     - fill the kettle @done(2016-09-04) @project(parent project / make coffee)
                     - boil the kettle @done(2016-09-04) @project(parent project / make coffee)
         """
-        indent = indentLevel * "\t"
+        sink = StringIO()
+        self.write_to(sink, indentLevel=indentLevel, title=title, tags=tags,
+                      projects=projects, tasks=tasks, notes=notes, retag=retag)
+        objectString = sink.getvalue()
 
-        objectString = ""
-        if title:
-            try:
-                # NONE DOCUMENT OBJECTS
-                objectString += self.title
-            except:
-                pass
+        return objectString
 
-            try:
-                if tags:
-                    tagString = (" @").join(tags)
-                else:
-                    tagString = (" @").join(self.tags)
+    def write_to(
+            self,
+            sink,
+            indentLevel=1,
+            title=True,
+            tags=None,
+            projects=None,
+            tasks=None,
+            notes=None,
+            retag=None):
+        """*stream this taskpaper object as text to a file-like sink*
 
-                if len(tagString):
-                    objectString += " @" + tagString
-            except:
-                pass
+        The tree is walked once and the text written to the sink in chunks, so no string of the whole object is ever built. Takes the same arguments as ``to_string``, which is a thin wrapper around this method.
 
-        try:
+        **Key Arguments:**
+            - ``sink`` -- the sink to write to, e.g. a ``StringIO``, an open file or a socket's file object (anything with a ``write`` method)
+            - ``indentLevel`` -- the level of the indent for this object. Default *1*.
+            - ``title`` -- print the title of the taskpaper object alongside the contents. Default *True*
+            - ``tags`` -- replace tags with these tags. Default *None*
+            - ``projects`` -- replace projects with these projects. Default *None*
+            - ``tasks`` -- replace tasks with these ones. Default *None*
+            - ``notes`` -- replace notes with these ones (note objects or strings). Default *None*
+            - ``retag`` -- a function mapping the list of tags of each task written to the tags to write in their place. Default *None*
+
+        **Usage:**
+
+            .. code-block:: python
+
+                writeFile = codecs.open("/path/to/archive.taskpaper", encoding='utf-8', mode='w')
+                archiveProject.write_to(writeFile)
+                writeFile.close()
+        """
+        writer = _textWriter(sink)
+        self._write_object(writer, indentLevel, title,
+                           tags, projects, tasks, notes, retag)
+        writer.end((0, 0))
+
+        return None
+
+    def _write_object(
+            self,
+            writer,
+            indentLevel=1,
+            title=True,
+            tags=None,
+            projects=None,
+            tasks=None,
+            notes=None,
+            retag=None):
+        """*write this taskpaper object and everything nested within it to a ``_textWriter``*
+
+        See ``write_to`` for the arguments. Each object is trimmed of leading and trailing whitespace as it is written.
+        """
+        mark = writer.begin()
+        indent = indentLevel * "\t"
+        objectType = self.meta.type
+
+        # DOCUMENTS HAVE NO TITLE OR TAGS OF THEIR OWN
+        written = False
+        if title:
+            if objectType is not None:
+                writer.write(self.title)
+                written = bool(len(self.title))
+                if not tags:
+                    tags = self.tags
+                    if retag and objectType == "task":
+                        tags = retag(tags)
+            tagString = (" @").join(tags or [])
+            if len(tagString):
+                writer.write(" @" + tagString)
+                written = True
+
+        # NOTES HOLD NOTHING BUT THEIR TITLE
+        if objectType != "note":
             if not notes:
                 notes = self.notes
             for n in notes:
-                if len(n.title.strip()):
-                    if not self.parent and len(objectString) == 0:
-                        objectString += indent + n.title.strip() + n.content
+                if isinstance(n, basestring):
+                    noteTitle = n.strip()
+                else:
+                    noteTitle = n.title.strip()
+                if len(noteTitle):
+                    if not self.parent and not written:
+                        writer.write(indent + noteTitle)
                     else:
-                        objectString += "\n" + indent + n.title.strip() + n.content
-        except:
-            pass
+                        writer.write("\n" + indent + noteTitle)
+                    written = True
 
-        try:
             if not tasks:
                 tasks = self.tasks
             for t in tasks:
-                objectString += "\n" + indent + t.to_string(indentLevel + 1)
-        except:
-            pass
+                writer.write("\n" + indent)
+                t._write_object(writer, indentLevel + 1, retag=retag)
 
-        try:
+        if objectType in (None, "project"):
             if not projects:
                 projects = self.projects
             for p in projects:
-                objectString += "\n" + indent + p.to_string(indentLevel + 1)
-        except:
-            pass
+                writer.write("\n" + indent)
+                p._write_object(writer, indentLevel + 1, retag=retag)
 
-        try:
-            objectString += "\n" + indent + self.searches
-        except:
-            pass
+            if not self.parent:
+                searches = self.searches
+                if searches:
+                    writer.write("\n" + indent + searches)
 
-        return objectString.strip()
+        writer.end(mark)
+
+        return None
 
     def tagged_projects(
             self,
@@ -429,18 +1454,9 @@ class baseClass():
             Note you can give the tag with or without the *@*, and you can also give a tag attribute, e.g. ``@due(today)``
         """
         self.refresh
-        projectList = []
         tag = tag.replace("@", "").lower()
-        for p in self.projects:
-            for aTag in p.tags:
-                if "(" not in tag:
-                    aTag = aTag.split("(")[0]
-                if aTag.lower() == tag:
-                    projectList.append(p)
-                    break
-
-            subProjects = p.tagged_projects(tag)
-            projectList += subProjects
+        projectList = [self._get_descendant(path)
+                       for path in _indexed_nodes(self.meta, "tags", [tag], "project")]
 
         return projectList
 
@@ -468,30 +1484,9 @@ class baseClass():
             Note you can give the tag with or without the *@*, and you can also give a tag attribute, e.g. ``@due(today)``
         """
         self.refresh
-        tasksList = []
         tag = tag.replace("@", "").lower()
-        for t in self.tasks:
-            for aTag in t.tags:
-                if "(" not in tag:
-                    aTag = aTag.split("(")[0]
-                if aTag.lower() == tag:
-                    tasksList.append(t)
-                    break
-
-            subtasks = t.tagged_tasks(tag)
-            tasksList += subtasks
-
-        isProject = False
-        try:
-            this = self.projects
-            isProject = True
-        except:
-            pass
-
-        if isProject:
-            for p in self.projects:
-                subtasks = p.tagged_tasks(tag)
-                tasksList += subtasks
+        tasksList = [self._get_descendant(path)
+                     for path in _indexed_nodes(self.meta, "tags", [tag], "task")]
 
         return tasksList
 
@@ -563,62 +1558,8 @@ class baseClass():
 
                 doc.sort_projects("@due, @flag, @hold, @next, @someday, @wait")
         """
-        self.refresh
-        if not isinstance(workflowTags, list):
-            workflowTagsLists = workflowTags.strip().replace(",", "").replace("@", "")
-            workflowTagsLists = workflowTagsLists.split(" ")
-        else:
-            workflowTagsLists = []
-            workflowTagsLists[:] = [l.replace("@", "") for l in workflowTags]
-        matchedProjects = collections.OrderedDict()
-        unmatchedProjects = []
-        for wt in workflowTagsLists:
-            matchedProjects[wt.lower()] = []
-        for p in self.projects:
-            matched = False
-            for pt in p.tags:
-                if matched:
-                    break
-                for wt in workflowTagsLists:
-                    thisTag = pt.lower()
-                    if "(" not in wt:
-                        thisTag = pt.split("(")[0].lower()
-                    if thisTag == wt.lower() and matched == False:
-                        matchedProjects[wt.lower()].append(p)
-                        matched = True
-                        break
-            if matched == False:
-                unmatchedProjects.append(p)
-
-        sortedProjects = []
-        for k, v in matchedProjects.iteritems():
-            sortedProjects += v
-
-        sortedProjects += unmatchedProjects
-        self.projects = sortedProjects
-
-        self.content = self.to_string(
-            title=False, projects=sortedProjects, indentLevel=0)
-
-        for p in self.projects:
-            p.projects = p.sort_projects(workflowTags)
-
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        oldContent = self.to_string(indentLevel=1)
-        newContent = self.to_string(
-            indentLevel=1, projects=sortedProjects)
-
-        if self.parent:
-            self.parent._update_document_tree(
-                oldContent=oldContent,
-                newContent=newContent
-            )
-
-        self.content = self.content.replace(self.to_string(indentLevel=0, title=False), self.to_string(
-            indentLevel=0, title=False, projects=sortedProjects))
-
-        self.refresh
+        self._sort(workflowTags, ["project"])
+        sortedProjects = self.projects
 
         return sortedProjects
 
@@ -653,101 +1594,126 @@ class baseClass():
 
                 doc.sort_tasks("@due, @flag, @hold, @next, @someday, @wait")
         """
-        self.refresh
-        if not isinstance(workflowTags, list):
-            workflowTagsLists = workflowTags.strip().replace(",", "").replace("@", "")
-            workflowTagsLists = workflowTagsLists.split(" ")
-        else:
-            workflowTagsLists = []
-            workflowTagsLists[:] = [l.replace("@", "") for l in workflowTags]
-        matchedTasks = collections.OrderedDict(sorted({}.items()))
-        unmatchedTasks = []
+        self._sort(workflowTags, ["task"])
+        sortedTasks = self.tasks
 
-        for wt in workflowTagsLists:
-            matchedTasks[wt.lower()] = []
-        for t in self.tasks:
-            matched = False
-            for tt in t.tags:
-                if matched:
-                    break
-                for wt in workflowTagsLists:
-                    thisTag = tt.lower()
-                    if "(" not in wt:
-                        thisTag = tt.split("(")[0].lower()
-                    if thisTag == wt.lower() and matched == False:
-                        matchedTasks[wt.lower()].append(t)
-                        matched = True
-                        break
-            if matched == False:
-                unmatchedTasks.append(t)
-
-        sortedTasks = []
-        for k, v in matchedTasks.iteritems():
-            sortedTasks += v
-
-        oldContent = self.to_string(indentLevel=1)
-        sortedTasks += unmatchedTasks
-        self.tasks = sortedTasks
-
-        self.content = self.to_string(
-            title=False, tasks=sortedTasks, indentLevel=0)
-
-        hasProjects = False
-        try:
-            this = self.projects
-            hasProjects = True
-        except:
-            pass
+        return sortedTasks
 
-        if hasProjects:
-            for p in self.projects:
-                p.tasks = p.sort_tasks(workflowTags, 1)
+    def sort(
+            self,
+            workflowTags):
+        """*order both the tasks and the projects within this taskpaper object via a list of tags*
 
-        for t in self.tasks:
-            t.tasks = t.sort_tasks(workflowTags, 1)
+        Equivalent to a ``tidy``, ``sort_tasks`` and ``sort_projects`` but the object is only rewritten once.
+
+        **Key Arguments:**
+            - ``workflowTags`` -- a string of space/comma seperated tags.
+
+        **Return:**
+            - ``None``
+
+        **Usage:**
 
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        newContent = self.to_string(
-            tasks=sortedTasks, indentLevel=1)
+            .. code-block:: python
 
-        if self.parent:
-            self.parent._update_document_tree(
-                oldContent=oldContent,
-                newContent=newContent
-            )
+                doc.sort("@due, @flag, @hold, @next, @someday, @wait")
+        """
+        self._sort(workflowTags, ["task", "project"])
+        return None
 
-        self.content = self.content.replace(self.to_string(indentLevel=0, title=False), self.to_string(
-            indentLevel=0, title=False, tasks=sortedTasks))
+    def _sort(
+            self,
+            workflowTags,
+            objectTypes):
+        """*reorder the nested projects and/or tasks of this object in the tree, then rewrite the object once*
 
+        **Key Arguments:**
+            - ``workflowTags`` -- a string of space/comma seperated tags, or a list of tags
+            - ``objectTypes`` -- the types of object to reorder (a list containing "project" and/or "task")
+        """
         self.refresh
-        return sortedTasks
+        # OBJECTS THAT ARE NO LONGER PART OF THE DOCUMENT CAN NOT BE EDITED
+        if not self._is_attached():
+            return None
+
+        # HELD-BACK EDITS ARE WRITTEN WHILE THE CHILDREN ARE STILL IN TEXT ORDER
+        self._get_document()._flush_edits()
+        _sort_nodes(self.meta, objectTypes, _workflow_ranks(workflowTags))
+        self._rewrite_subtree()
+
+        return None
 
     def _get_object(
         self,
-        regex,
         objectType,
         content=None
     ):
         # INITIATE THE OBJECTS LIST
         objectList = []
 
-        # READ THE CONTENT OF THE PARENT OBJECT
+        # READ THE PARSED TREE OF THE PARENT OBJECT, OR PARSE THE GIVEN CONTENT
         if not content:
-            content = self.content
-
-        # FIND ALL OCCURANCE OF THE REGEX IN CONTENT
-
-        thisIter = regex.finditer(content)
-        for item in thisIter:
-            match = {
-                "title": item.group("title"),
-                "tagString": item.group("tagString"),
-                "content": item.group("content"),
-                "startIndex": item.start(),
-                "endIndex": item.end(),
-                "raw_content": item.group()
-            }
+            matches = self._get_parsed_tree()
+
+            # CHILD OBJECTS ARE ONLY REBUILT IF THE TREE OR GENERATION HAS
+            # CHANGED SINCE THEY WERE LAST BUILT
+            generation = self._get_generation()
+            cache = self.__dict__.get("_childCache")
+            if not cache or cache["matches"] is not matches or cache["generation"] != generation:
+                cache = {"matches": matches, "generation": generation}
+                self._childCache = cache
+            if objectType not in cache:
+                cache[objectType] = self._build_objects(
+                    matches, objectType)
+                if isinstance(cache[objectType], list):
+                    views = cache.setdefault("views", {})
+                    for o in cache[objectType]:
+                        views[o.meta] = o
+            objectList = cache[objectType]
+            if isinstance(objectList, list):
+                objectList = objectList[:]
+            return objectList
+
+        matches = _parse_taskpaper(content).children
+        return self._build_objects(matches, objectType)
+
+    def _get_descendant(
+            self,
+            path):
+        """*get the taskpaper object built for a node nested within this object*
+
+        The objects are taken from the cached child collections of each object along the path, so they are the same objects found through the ``projects`` and ``tasks`` properties.
+
+        **Key Arguments:**
+            - ``path`` -- the list of nodes leading from a child of this object down to the nested node
+
+        **Return:**
+            - ``descendant`` -- the taskpaper object of the final node in the path
+        """
+        descendant = self
+        for node in path:
+            descendant._get_object(objectType=node.type)
+            descendant = descendant._childCache["views"][node]
+
+        return descendant
+
+    def _build_objects(
+            self,
+            matches,
+            objectType):
+        """*build the taskpaper objects of a given type from a list of parsed matches*
+
+        **Key Arguments:**
+            - ``matches`` -- the list of parsed nodes
+            - ``objectType`` -- the type of object to build [project|task|note|searchBlock]
+
+        **Return:**
+            - ``objectList`` -- the list of new taskpaper objects (or the raw search-block string)
+        """
+        objectList = []
+        for match in matches:
+            if match.type != objectType:
+                continue
             if objectType == "project":
                 objectList.append(project(match, self))
             if objectType == "note":
@@ -755,9 +1721,242 @@ class baseClass():
             if objectType == "task":
                 objectList.append(task(match, self))
             if objectType == "searchBlock":
-                objectList = item.group()
+                start = _node_start(match)
+                return _node_root(match).buffer[start + match.indent:start + match.length].rstrip()
+
+        return objectList
+
+    def _get_generation(
+            self):
+        """*get the generation counter of this taskpaper object*
+
+        **Return:**
+            - ``generation`` -- the number of times this object (or anything nested within it) has been changed
+        """
+        return self.meta.generation
+
+    def _bump_generation(
+            self):
+        """*bump the generation counter of this object and all of its ancestors*
+
+        Called after every mutation so that the cached child collections of the changed objects (and only those objects) are rebuilt the next time they are read.
+        """
+        thisObject = self
+        while thisObject:
+            thisObject.meta.generation += 1
+            if not thisObject.parent:
+                thisObject.generation += 1
+            thisObject = thisObject.parent
+
+        return None
+
+    def _get_document(
+            self):
+        """*walk up the tree to find the document containing this taskpaper object*
+
+        **Return:**
+            - ``doc`` -- the root taskpaper object
+        """
+        doc = self
+        while doc.parent:
+            doc = doc.parent
+
+        return doc
+
+    def _is_attached(
+            self):
+        """*is the parsed node behind this object still part of its document's tree?*
+
+        Nodes keep their identity through edits, sorts and tidies. Only a deleted project (or an object dropped from a rewrite of the document) is cut from the tree, and it is then given a root of its own (see ``_detach_node``).
+
+        **Return:**
+            - ``attached`` -- True or False
+        """
+        return _node_root(self.meta) is self._get_document().meta
+
+    def _get_parsed_tree(
+            self):
+        """*get the parsed tree of matches nested directly beneath this taskpaper object*
+
+        Objects created from a parsed document carry their part of the tree with them, so the document text is only parsed once however deeply the objects are nested.
+
+        **Return:**
+            - ``matches`` -- list of the child nodes
+        """
+        return self.meta.children
+
+    def _set_tag_line(
+            self,
+            tags):
+        """*rewrite the first line of this object with a new list of tags*
+
+        Only the span of the first line is spliced in the document, so the cost of the edit does not depend on the size of the document. Within a batch (see ``document.batch``) the new line is held back until the batch ends.
+
+        **Key Arguments:**
+            - ``tags`` -- the new list of tags (without the *@*)
+        """
+        # OBJECTS THAT ARE NO LONGER PART OF THE DOCUMENT CAN NOT BE EDITED
+        if not self._is_attached():
+            return None
+
+        node = self.meta
+        root = _node_root(node)
+
+        line = node.title
+        for t in tags:
+            line += " @" + t
+
+        _index_nodes(root, node, add=False, recursive=False)
+        if root.pendingLines is not None:
+            # IN A BATCH THE NEW LINE IS ONLY WRITTEN WHEN THE BATCH ENDS
+            root.pendingLines[node] = line
+        else:
+            start = _node_start(node)
+            delta = _splice_text(root, start + node.indent,
+                                 start + node.lineLength, line)
+            node.lineLength += delta
+            _resize_node(node, delta)
+        objectType, node.titleEnd, node.tagStart, node.tagEnd = _parse_line(
+            line, node.type)
+        _index_nodes(root, node, recursive=False)
+
+        if root.pendingLines is None:
+            self._bump_generation()
+        return None
+
+    def _insert_child(
+            self,
+            line):
+        """*splice a new line into the document as a child of this object*
+
+        A new note comes before any existing children (so the newest note is listed first). Any other new child follows the existing notes, tasks and then projects to keep the order used by ``to_string``.
+
+        **Key Arguments:**
+            - ``line`` -- the text of the new child (without indentation)
+
+        **Return:**
+            - ``child`` -- the new taskpaper object
+        """
+        # OBJECTS THAT ARE NO LONGER PART OF THE DOCUMENT CAN NOT BE EDITED
+        if not self._is_attached():
+            return None
+        self._get_document()._flush_edits()
+
+        node = self.meta
+        root = _node_root(node)
+        start = _node_start(node)
+
+        indent = ""
+        if node.parent is not None:
+            indent = root.buffer[start:start + node.indent] + "\t"
+        text = indent + line + "\n"
+        newNode = _parse_taskpaper(text, nested=True).children[0]
+
+        # THE FINAL LINE OF A DOCUMENT MAY HAVE NO TRAILING NEWLINE
+        atEnd = start + node.length >= len(root.buffer) and root.buffer[-1:] != "\n"
+        if atEnd:
+            _terminate_text(root)
+
+        # FIND THE LAST CHILD THAT SHOULD COME BEFORE THE NEW ONE
+        rank = {"note": 0, "task": 1, "project": 2, "searchBlock": 3}
+        index = 0
+        if newNode.type != "note":
+            for i, child in enumerate(node.children):
+                if rank.get(child.type, 0) <= rank.get(newNode.type, 0):
+                    index = i + 1
+
+        # THE NEW LINE GOES STRAIGHT AFTER THE LAST NON-BLANK LINE OF THAT
+        # CHILD (OR THIS OBJECT'S FIRST LINE) AND ANY BLANK LINES THAT FOLLOWED
+        # IT NOW TRAIL THE NEW CHILD INSTEAD
+        bodyStart = start + node.lineLength + 1
+        if index == 0:
+            offset = 0
+            if len(node.children):
+                blank = node.children[0].offset
+            else:
+                blank = node.length - node.lineLength - 1
+        else:
+            previous = node.children[index - 1]
+            previousStart = bodyStart + previous.offset
+            previousText = root.buffer[
+                previousStart:previousStart + previous.length]
+            lineEnd = previousText.find("\n", len(previousText.rstrip()))
+            if lineEnd == -1:
+                lineEnd = len(previousText) - 1
+            offset = previous.offset + lineEnd + 1
+            blank = previous.offset + previous.length - offset
+            while previous:
+                previous.length -= blank
+                previous = previous.children and previous.children[-1]
+
+        _splice_text(root, bodyStart + offset, bodyStart + offset, text)
+        newNode.offset = offset
+        newNode.length += blank
+        newNode.parent = node
+        node.children.insert(index, newNode)
+        _resize_node(node, len(text), childIndex=index + 1)
+        _index_nodes(root, newNode)
+
+        if atEnd:
+            _unterminate_text(root)
+
+        self._bump_generation()
+        for child in self._get_object(objectType=newNode.type):
+            if child.meta is newNode:
+                return child
+
+        return None
+
+    def _rewrite_subtree(
+            self,
+            projects=None,
+            tasks=None):
+        """*replace this object in the document with its tidied string representation*
 
-        return objectList
+        Only the span of this object is spliced in the document, and only its part of the tree is re-parsed. The re-parsed spans are moved onto the object's existing nodes (see ``_adopt_nodes``).
+
+        **Key Arguments:**
+            - ``projects`` -- write the object with these projects (in this order). Default *None*
+            - ``tasks`` -- write the object with these tasks (in this order). Default *None*
+        """
+        self._get_document()._flush_edits()
+        if not self.parent:
+            self._set_content(self.to_string(
+                indentLevel=0, title=False, projects=projects, tasks=tasks))
+            return None
+
+        # OBJECTS THAT ARE NO LONGER PART OF THE DOCUMENT CAN NOT BE EDITED
+        if not self._is_attached():
+            return None
+
+        node = self.meta
+        root = _node_root(node)
+        start = _node_start(node)
+        end = start + node.length
+        buffer = root.buffer
+
+        indent = buffer[start:start + node.indent]
+        text = self.to_string(indentLevel=1, projects=projects, tasks=tasks)
+        text = ("\n").join(indent + l for l in text.split("\n"))
+        if buffer[end - 1:end] == "\n":
+            text += "\n"
+
+        # THE NODES OF THE SUBTREE ARE KEPT, SO OBJECTS ALREADY HANDED OUT FOR
+        # THEM STAY VALID
+        newNode = _parse_taskpaper(text, nested=True).children[0]
+        _index_nodes(root, node, add=False)
+        keys = _node_keys(node)
+        oldText = buffer[start:end]
+        oldLength = node.length
+        _splice_text(root, start, end, text)
+        _adopt_nodes(node, newNode, keys, oldText)
+        parent = node.parent
+        _resize_node(parent, len(text) - oldLength,
+                     childIndex=_child_index(parent, node) + 1)
+        _index_nodes(root, node)
+
+        self._bump_generation()
+        return None
 
     def tidy(self):
         """*Tidy this taskpapaer object so that sub-objects appear in this order: title, tags, notes, tasks, projects*
@@ -773,36 +1972,8 @@ class baseClass():
 
                 doc.tidy()
         """
-        try:
-            self.tags.sort(lambda x, y: cmp(len(x), len(y)))
-        except:
-            pass
-
-        try:
-            for t in self.tasks:
-                t.tidy()
-        except:
-            pass
-
-        try:
-            for p in self.projects:
-                p.tidy()
-        except:
-            pass
-
-        # REMOVE BLANK LINES
-        if self.content:
-            if self.parent:
-                self.content = ("\n").join(self.to_string(
-                    indentLevel=0).split("\n")[1:])
-            else:
-                regex = re.compile(r'\s*?\n\s*?\n')
-                while "\n\n" in self.content:
-                    self.content = regex.sub("\n", self.content)
-
-        if not self.parent:
-            self.content = self.to_string(
-                indentLevel=0, title=False)
+        self.refresh
+        self._rewrite_subtree()
         return None
 
     def add_project(
@@ -814,8 +1985,6 @@ class baseClass():
         **Key Arguments:**
             - ``title`` -- the title for the project.
             - ``tags`` -- tag string (*"@one @two(data)"*) or list of tags (*['one', 'two(data)']*)
-            - ``oldContent`` -- the old content to be replaced in parent object (user sould not need to give this)
-            - ``newContent`` -- the replacement text for the parent object  (user sould not need to give this)
 
         **Return:**
             - ``project`` -- the new taskpaper project object
@@ -849,91 +2018,10 @@ class baseClass():
             tagString = tagString.strip()
             project += " " + tagString
 
-        newProject = self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>(?!\[Searches\]|- )\S.*?:(?!\S)) *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+)?(?P<content>(\n(( |\t)+\S.*)|\n( |\t)*|\n)+)', re.UNICODE),
-            objectType="project",
-            content=project
-        )
-
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        oldContent = self.to_string(indentLevel=1)
-        newContent = self.to_string(
-            indentLevel=1, projects=self.projects + newProject)
-
-        if self.parent:
-            doc = self.parent._update_document_tree(
-                oldContent=oldContent,
-                newContent=newContent
-            )
-
-        self.content = self.content.replace(self.to_string(indentLevel=0, title=False), self.to_string(
-            indentLevel=0, title=False, projects=self.projects + newProject))
-
-        doc = self
-        while doc.parent:
-            doc = doc.parent
-        doc.refresh
-
-        if not self.parent:
-            parent = self
-        else:
-            parent = doc.get_project(self.title)
-
-        thisProject = parent.get_project(title)
+        thisProject = self._insert_child(project)
 
-        self.refresh
         return thisProject
 
-    def _update_document_tree(
-            self,
-            oldContent=None,
-            newContent=None):
-        """*update document tree*
-
-        **Key Arguments:**
-            - ``oldContent`` -- the old content to be replaced in parent object (user sould not need to give this)
-            - ``newContent`` -- the replacement text for the parent object  (user sould not need to give this)
-
-        **Return:**
-            - ``doc`` -- the updated document object
-        """
-        self.refresh
-        if self.parent:
-            self.refresh
-            indentOldContent = ""
-            indentNewContent = ""
-            for l in oldContent.split("\n"):
-                indentOldContent += "\t" + l + "\n"
-            uoldContent = indentOldContent[:-1]
-            for l in newContent.split("\n"):
-                indentNewContent += "\t" + l + "\n"
-            unewContent = indentNewContent[:-1]
-
-            thisOldContent = self.to_string(indentLevel=1)
-            thisNewContent = thisOldContent.replace(uoldContent, unewContent)
-
-            self.content = self.to_string(
-                indentLevel=0, title=False).replace(oldContent, newContent)
-
-            self.content = self.to_string(
-                indentLevel=0, title=False).replace(oldContent, newContent)
-
-            # REPLACE THE NEW CONTENT OF THIS PROJECT IN THE PARENT OBJECT'S
-            # CONTENT
-            doc = self.parent._update_document_tree(
-                oldContent=thisOldContent,
-                newContent=thisNewContent
-            )
-
-        else:
-            self.content = self.content.replace(oldContent, newContent)
-            doc = self
-
-        self.refresh
-        return doc
-
     def add_tag(
             self,
             tag):
@@ -948,23 +2036,11 @@ class baseClass():
 
                 aTask.add_tag("@due")
         """
-
         if tag.replace("@", "") in self.tags:
             return
 
         self.refresh
-        oldContent = self.to_string(indentLevel=1)
-        self.tags += [tag.replace("@", "")]
-        newContent = self.to_string(indentLevel=1)
-
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        self.parent._update_document_tree(
-            oldContent=oldContent,
-            newContent=newContent
-        )
-
-        self.refresh
+        self._set_tag_line(self.tags + [tag.replace("@", "")])
         return None
 
     def del_tag(
@@ -981,25 +2057,14 @@ class baseClass():
 
                 aTask.del_tag("@due")
         """
-
-        if tag.replace("@", "") not in self.tags:
+        tag = tag.replace("@", "")
+        if tag not in self.tags:
             return
 
         self.refresh
-        oldContent = self.to_string(indentLevel=1)
         newTags = []
-        newTags[:] = [n for n in newTags if tag not in n]
-        self.tags = newTags
-        newContent = self.to_string(indentLevel=1)
-
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        self.parent._update_document_tree(
-            oldContent=oldContent,
-            newContent=newContent
-        )
-
-        self.refresh
+        newTags[:] = [t for t in self.tags if t != tag]
+        self._set_tag_line(newTags)
         return None
 
     def set_tags(
@@ -1018,23 +2083,11 @@ class baseClass():
         """
         self.refresh
         tagList = []
-        regex = re.compile(r'@[^@]*', re.S)
-        matchList = regex.findall(tags)
+        matchList = tagRegex.findall(tags)
         for m in matchList:
             tagList.append(m.strip().replace("@", ""))
 
-        self.refresh
-        oldContent = self.to_string(indentLevel=1)
-        self.tags = tagList
-        newContent = self.to_string(indentLevel=1)
-
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        self.parent._update_document_tree(
-            oldContent=oldContent,
-            newContent=newContent
-        )
-        self.refresh
+        self._set_tag_line(tagList)
         return None
 
     def done(
@@ -1060,18 +2113,9 @@ class baseClass():
                 aTask.done("all")
         """
         self.refresh
-        oldContent = self.to_string(indentLevel=1)
         now = datetime.now()
         now = now.strftime("%Y-%m-%d %H:%M:%S")
-        newContent = self.to_string(
-            indentLevel=1, tags=["done(%(now)s)" % locals()])
-
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        self.parent._update_document_tree(
-            oldContent=oldContent,
-            newContent=newContent
-        )
+        self._set_tag_line(["done(%(now)s)" % locals()])
 
         if depth == "all":
             try:
@@ -1082,14 +2126,10 @@ class baseClass():
 
             try:
                 for p in self.projects:
-                    t.done("all")
+                    p.done("all")
             except:
                 pass
 
-        self.content = self.to_string(indentLevel=0, title=False)
-
-        self.refresh
-
         return self
 
     def notestr(
@@ -1153,44 +2193,7 @@ class baseClass():
             tagString = tagString.strip()
             task += " " + tagString
 
-        newTask = self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>- ((?! @).)*)( *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+))?(?P<content>(\n(( |\t)+\S.*)|\n( |\t)*)*)', re.UNICODE),
-            objectType="task",
-            content=task
-        )
-
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        oldContent = self.to_string(indentLevel=1)
-        newContent = self.to_string(
-            indentLevel=1, tasks=self.tasks + newTask)
-
-        if self.parent:
-            doc = self.parent._update_document_tree(
-                oldContent=oldContent,
-                newContent=newContent
-            )
-
-        self.content = self.content.replace(self.to_string(indentLevel=0, title=False), self.to_string(
-            indentLevel=0, title=False, tasks=self.tasks + newTask))
-
-        doc = self
-        while doc.parent:
-            doc = doc.parent
-        doc.refresh
-
-        if not self.parent:
-            parent = self
-        else:
-
-            parent = doc.get_project(self.title)
-        if not parent:
-            parent = doc.get_task(self.title)
-
-        thisTask = parent.get_task(title)
-
-        self.refresh
+        thisTask = self._insert_child(task)
 
         return thisTask
 
@@ -1203,7 +2206,7 @@ class baseClass():
             - ``note`` -- the note (string)
 
         **Return:**
-            - None
+            - ``note`` -- the new taskpaper note object
 
         **Usage:**
 
@@ -1216,35 +2219,97 @@ class baseClass():
         self.refresh
         note = note.strip()
 
-        newNote = self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>\S(?<!-)((?!(: +@|: *\n|: *$)).)*)\s*?(\n|$)(?P<tagString>&&&)?(?P<content>&&&)?', re.UNICODE),
-            objectType="note",
-            content=note
-        )
+        newNote = self._insert_child(note)
+
+        return newNote
 
-        # ADD DIRECTLY TO CONTENT IF THE PROJECT IS BEING ADDED SPECIFICALLY TO
-        # THIS OBJECT
-        oldContent = self.to_string(indentLevel=1)
-        newContent = self.to_string(
-            indentLevel=1)
 
-        if self.parent:
-            self.parent._update_document_tree(
-                oldContent=oldContent,
-                newContent=newContent
-            )
+class documentPool(object):
+    """
+    *A bounded pool of open taskpaper documents, shared so that each file is only read and parsed once*
 
-        self.notes = newNote + self.notes
-        self.content = self.content.replace(self.to_string(indentLevel=0, title=False), self.to_string(
-            indentLevel=0, title=False))
+    Documents are keyed by path. A pooled document is only handed out again while it still matches its file (the file's size and modification time are unchanged) and has no unsaved changes; otherwise the file is read afresh. The least recently used documents are dropped once the pool holds more than ``maxEntries`` documents or ``maxBytes`` characters of text.
 
-        doc = self
-        while doc.parent:
-            doc = doc.parent
-        doc.refresh
+    **Key Arguments:**
+        - ``maxEntries`` -- the most documents to hold. Default *64*
+        - ``maxBytes`` -- the most text (in characters) to hold across all documents. Default *64MB*
+
+    **Usage:**
+
+        The pool shared by tastic is found at ``document.pool``, and used via ``document.open``:
 
-        return newNote[0]
+        .. code-block:: python
+
+            from tastic.tastic import document
+            document.pool.resize(maxEntries=256)
+            doc = document.open("path/to/saturday-tasks.taskpaper")
+    """
+
+    def __init__(
+            self,
+            maxEntries=64,
+            maxBytes=64 * 1024 * 1024):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self._documents = collections.OrderedDict()
+
+    def open(
+            self,
+            filepath,
+            cacheDir=None):
+        """*get the document for a file from the pool, reading the file if needed*
+
+        **Key Arguments:**
+            - ``filepath`` -- path to the taskpaper document
+            - ``cacheDir`` -- a directory to cache parsed documents in (see ``document``). Default *None*
+
+        **Return:**
+            - ``doc`` -- the taskpaper document
+        """
+        key = os.path.abspath(filepath)
+        doc = self._documents.pop(key, None)
+        if doc is not None and (os.path.abspath(doc.filepath) != key or not doc._is_current()):
+            doc = None
+        if doc is None:
+            doc = document(filepath, cacheDir=cacheDir)
+        self._documents[key] = doc
+        self._evict()
+
+        return doc
+
+    def resize(
+            self,
+            maxEntries=None,
+            maxBytes=None):
+        """*change the limits of the pool*
+
+        **Key Arguments:**
+            - ``maxEntries`` -- the most documents to hold. Default *None* (unchanged)
+            - ``maxBytes`` -- the most text (in characters) to hold across all documents. Default *None* (unchanged)
+        """
+        if maxEntries is not None:
+            self.maxEntries = maxEntries
+        if maxBytes is not None:
+            self.maxBytes = maxBytes
+        self._evict()
+
+        return None
+
+    def clear(
+            self):
+        """*drop all of the documents from the pool*"""
+        self._documents.clear()
+        return None
+
+    def _evict(
+            self):
+        """*drop the least recently used documents until the pool is within its limits (the most recent document is always kept)*"""
+        total = sum(len(doc.meta.buffer) for doc in self._documents.values())
+        while len(self._documents) > 1 and (len(self._documents) > self.maxEntries or total > self.maxBytes):
+            key, doc = self._documents.popitem(last=False)
+            total -= len(doc.meta.buffer)
+
+        return None
 
 
 class document(baseClass):
@@ -1253,6 +2318,7 @@ class document(baseClass):
 
     **Key Arguments:**
         - ``filepath`` -- path to the taskpaper document
+        - ``cacheDir`` -- a directory to cache the parsed document in (e.g. ``~/.cache/tastic``). When the file is opened again unchanged (same size, modification time and content) the parsed tree is read back from the cache instead of parsing the text. Default *None* (no cache)
 
     **Usage:**
 
@@ -1265,20 +2331,126 @@ class document(baseClass):
                 taskpaperFile = "path/to/saturday-tasks.taskpaper"
                 doc = document(taskpaperFile)
 
+            To reuse the parsed document the next time the file is read:
+
+            .. code-block:: python
+
+                doc = document(taskpaperFile, cacheDir="~/.cache/tastic")
+
+            To share documents that are opened many times over, open them through the pool of open documents instead (see ``open``).
+
             Note that tastic will tidy the contents of the file when it is read into memory. See the `tidy()` method for details.
     """
 
-    def __init__(self, filepath, parentObject=None):
+    def __init__(self, filepath, parentObject=None, cacheDir=None):
         self.filepath = filepath
+        self.cacheDir = cacheDir
         self.raw_content = self._get_raw_content()
-        self.content = self.raw_content
+        self.meta = None
+        if cacheDir:
+            self.meta = _read_tree_cache(
+                cacheDir, filepath, self._saved, piecetable(self.raw_content))
+        if self.meta is None:
+            self.meta = _parse_taskpaper(self.raw_content)
+            if cacheDir:
+                _write_tree_cache(cacheDir, filepath, self._saved, self.meta)
         self.level = -1
         self.parent = None
+        self.generation = 0
+        self._savedGeneration = 0
         self.filename = os.path.basename(self.filepath)
 
+    # THE POOL OF OPEN DOCUMENTS SHARED BY TASTIC (SEE ``open``)
+    pool = documentPool()
+
     def __repr__(self):
         return "<Taskpaper Document `%s`>" % self.filename
 
+    @classmethod
+    def open(
+            cls,
+            filepath,
+            cacheDir=None):
+        """*open a taskpaper document through the shared pool of open documents*
+
+        The same document object is returned each time a file is opened, for as long as it still matches the file on disk and has no unsaved changes. A file is only read and parsed again if it has changed, the document has been changed in memory without being saved, or the document has been dropped from the pool (see ``documentPool``).
+
+        **Key Arguments:**
+            - ``filepath`` -- path to the taskpaper document
+            - ``cacheDir`` -- a directory to cache parsed documents in. Default *None*
+
+        **Return:**
+            - ``doc`` -- the taskpaper document
+
+        **Usage:**
+
+            .. code-block:: python
+
+                from tastic.tastic import document
+                doc = document.open("path/to/saturday-tasks.taskpaper")
+        """
+        return cls.pool.open(filepath, cacheDir=cacheDir)
+
+    @classmethod
+    def from_string(
+            cls,
+            content,
+            filepath=None,
+            cacheDir=None):
+        """*build a taskpaper document from text held in memory, without reading a file*
+
+        **Key Arguments:**
+            - ``content`` -- the taskpaper text of the document
+            - ``filepath`` -- the path the document is saved to. Default *None* (a path must then be given to ``save``)
+            - ``cacheDir`` -- a directory to cache the parsed document in when it is saved. Default *None*
+
+        **Return:**
+            - ``doc`` -- the taskpaper document
+
+        **Usage:**
+
+            .. code-block:: python
+
+                from tastic.tastic import document
+                doc = document.from_string(u"project:\n\t- a task @flag", filepath="path/to/new.taskpaper")
+                doc.sort("@due, @flag")
+                doc.save()
+        """
+        return cls.from_tree(_parse_taskpaper(content.replace("    ", "\t")), filepath=filepath, cacheDir=cacheDir)
+
+    @classmethod
+    def from_tree(
+            cls,
+            tree,
+            filepath=None,
+            cacheDir=None):
+        """*build a taskpaper document around a tree that has already been parsed*
+
+        The document takes ownership of the tree, so the tree must not belong to another document (see ``_copy_tree``). Saving the document always writes its file, as it has never been read from it.
+
+        **Key Arguments:**
+            - ``tree`` -- the root node of the parsed tree (as held in ``doc.meta``)
+            - ``filepath`` -- the path the document is saved to. Default *None* (a path must then be given to ``save``)
+            - ``cacheDir`` -- a directory to cache the parsed document in when it is saved. Default *None*
+
+        **Return:**
+            - ``doc`` -- the taskpaper document
+        """
+        # ``__init__`` READS THE FILE, SO THE (OLD-STYLE) INSTANCE IS BUILT WITHOUT IT
+        doc = types.InstanceType(cls)
+        doc.filepath = filepath
+        doc.cacheDir = cacheDir
+        doc.raw_content = unicode(tree.buffer)
+        doc._saved = (None, None, None)
+        doc.meta = tree
+        doc.level = -1
+        doc.parent = None
+        doc.generation = 0
+        doc._savedGeneration = 0
+        doc.filename = filepath and os.path.basename(filepath)
+
+        return doc
+
     @property
     def raw_content(
             self):
@@ -1293,12 +2465,128 @@ class document(baseClass):
         """
         return self.raw_content
 
+    @property
+    def content(
+            self):
+        """*The current text content of this taskpaper document*
+
+        **Usage:**
+
+            .. code-block:: python
+
+                print doc.content
+        """
+        self._flush_edits()
+        return unicode(self.meta.buffer)
+
+    @contextmanager
+    def batch(
+            self):
+        """*batch many edits of the document's objects together*
+
+        Within the batch, changes to the tags of tasks and projects (``add_tag``, ``del_tag``, ``set_tags`` and ``done``) are held back and all written into the document's text in a single pass when the batch ends. The objects report their new tags straight away. Any other edit, or reading the text of the document or its objects, writes the held-back changes first. Batches can be nested; the changes are written when the outermost batch ends.
+
+        **Usage:**
+
+            .. code-block:: python
+
+                with doc.batch():
+                    for t in doc.all_tasks():
+                        t.del_tag("@next")
+                        t.add_tag("@flag")
+                doc.save()
+        """
+        root = self.meta
+        outermost = root.pendingLines is None
+        if outermost:
+            root.pendingLines = {}
+        try:
+            yield self
+        finally:
+            if outermost:
+                self._flush_edits()
+                root.pendingLines = None
+
+    def _flush_edits(
+            self):
+        """*write any edits held back by a batch into the document's text (see ``batch``)*"""
+        edited = _apply_line_edits(self.meta)
+        if not len(edited):
+            return None
+
+        # REBUILD THE CACHED CHILDREN OF THE EDITED OBJECTS AND THEIR ANCESTORS
+        bumped = set()
+        for node in edited:
+            while node is not None and node not in bumped:
+                node.generation += 1
+                bumped.add(node)
+                node = node.parent
+        self.generation += 1
+
+        return None
+
+    def _set_content(
+            self,
+            content):
+        """*replace the entire content of this document and re-parse it*
+
+        The re-parsed spans are moved onto the document's existing nodes wherever an object is still found in the new content (see ``_adopt_nodes``), so the objects already handed out for them stay valid.
+
+        **Key Arguments:**
+            - ``content`` -- the new text content of the document
+        """
+        self._flush_edits()
+        root = self.meta
+        newRoot = _parse_taskpaper(content)
+        keys = _node_keys(root)
+        oldText = unicode(root.buffer)
+        root.buffer = newRoot.buffer
+        _adopt_nodes(root, newRoot, keys, oldText)
+        root.tagIndex = None
+        root.titleIndex = None
+
+        self._bump_generation()
+        return None
+
+    def _copy(
+            self):
+        """*copy the document onto a tree of its own, for scratch edits that must not reach this document*
+
+        The copy is not added to the pool of open documents. Saving the copy writes to the same file as this document.
+
+        **Return:**
+            - ``docCopy`` -- the copy of the document
+        """
+        self._flush_edits()
+        docCopy = copy.copy(self)
+        docCopy.__dict__.pop("_childCache", None)
+        docCopy.meta = _copy_tree(self.meta)
+
+        return docCopy
+
+    def _is_current(
+            self):
+        """*does the document still match its file, with no changes made in memory since it was read or saved?*
+
+        **Return:**
+            - ``current`` -- True or False
+        """
+        if self.meta.pendingLines or self.generation != self._savedGeneration:
+            return False
+
+        return self._saved[:2] == (self.filepath, _file_signature(self.filepath))
+
     def _get_raw_content(self):
 
         readFile = codecs.open(self.filepath, encoding='utf-8', mode='r')
-        content = readFile.read().replace("    ", "\t")
+        signature = _file_signature(self.filepath)
+        content = readFile.read()
         readFile.close()
 
+        # REMEMBER WHAT IS ON DISK SO UNCHANGED DOCUMENTS ARE NOT REWRITTEN
+        self._saved = (self.filepath, signature, _text_hash(content))
+        content = content.replace("    ", "\t")
+
         return content
 
     @property
@@ -1317,9 +2605,8 @@ class document(baseClass):
                 # DOCUMENT SEARCHES
                 docSearchBlock = doc.searches
         """
+        self._flush_edits()
         return self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>\[Searches\]:) *(?P<tagString>( *?@\S*(\(.*?\))?)+)?(?P<content>(\n(    |\t).*)*)', re.UNICODE),
             objectType="searchBlock",
             content=None
         )
@@ -1329,6 +2616,8 @@ class document(baseClass):
             copypath=None):
         """*save the content of the document back to the file*
 
+        The file is only written if the content differs from what was last read from (or saved to) the file, and the file has not been changed by anything else since. The content is written to a temporary file that is swapped into place once it is safely on disk, so a crash never leaves a partial file behind.
+
         **Key Arguments:**
             - ``copypath`` -- the path to a new file if you want to make a copy of the document instead of saving it to the original filepath. Default *None*
 
@@ -1350,14 +2639,23 @@ class document(baseClass):
         self.refresh
         if copypath:
             self.filepath = copypath
-
-        content = self.content
-
-        import codecs
-        # SET ENCODE ERROR RETURN VALUE
-        writeFile = codecs.open(self.filepath, encoding='utf-8', mode='w')
-        writeFile.write(content)
-        writeFile.close()
+            self.filename = os.path.basename(copypath)
+
+        self._flush_edits()
+        buffer = self.meta.buffer
+        contentHash = _text_hash(buffer)
+        if self._saved == (self.filepath, _file_signature(self.filepath), contentHash):
+            self._savedGeneration = self.generation
+            return None
+
+        # STREAM THE DOCUMENT'S TEXT BUFFER STRAIGHT TO THE FILE
+        atomic_write(self.filepath, buffer.write)
+        self._saved = (self.filepath, _file_signature(
+            self.filepath), contentHash)
+        if self.cacheDir:
+            _write_tree_cache(self.cacheDir, self.filepath,
+                              self._saved, self.meta)
+        self._savedGeneration = self.generation
 
         return None
 
@@ -1375,34 +2673,7 @@ class document(baseClass):
                 doc.refresh
         """
 
-        self.projects = self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>(?!\[Searches\]|- )\S.*?:(?!\S)) *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+)?(?P<content>(\n(( |\t)+\S.*)|\n( |\t)*|\n)+)', re.UNICODE),
-            objectType="project",
-            content=None
-        )
-
-        self.tasks = self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>- ((?! @).)*)( *(?P<tagString>( *?@[^(\s]+(\([^)]*\))?)+))?(?P<content>(\n(( |\t)+\S.*)|\n( |\t)*)*)', re.UNICODE),
-            objectType="task",
-            content=None
-        )
-
-        self.notes = self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>\S(?<!-)((?!(: +@|: *\n|: *$)).)*)\s*?(\n|$)(?P<tagString>&&&)?(?P<content>&&&)?', re.UNICODE),
-            objectType="note",
-            content=None
-        )
-
-        self.search = self._get_object(
-            regex=re.compile(
-                r'((?<=\n)|(?<=^))(?P<title>\[Searches\]:) *(?P<tagString>( *?@\S*(\(.*?\))?)+)?(?P<content>(\n( |\t).*)*)', re.UNICODE),
-            objectType="searchBlock",
-            content=None
-        )
-
+        # THE DOCUMENT'S OBJECTS ARE ALWAYS READ DIRECTLY FROM ITS PARSED TREE
         return None
 
     def set_tags(self):
@@ -1432,6 +2703,8 @@ class task(baseClass):
             self):
         """*Refreshs this tasks's attributes if, for example, the parent document's projects or tasks has been sorted*
 
+        The nodes behind taskpaper objects keep their identity through any change to the document, so objects are always up to date and refreshing them is a no-op (kept for backwards compatibility).
+
         **Usage:**
 
             To refresh the task:
@@ -1441,24 +2714,8 @@ class task(baseClass):
                 aTask.refresh
         """
 
-        if self.parent:
-            self.parent.refresh
-
-        replace = None
-        title = self.title
-        for t in self.parent.tasks:
-            if t.title == title:
-                replace = t
-        if not replace:
-            return
-
-        self.tags = replace.tags
-
-        self.notes = replace.notes
-        self.tasks = replace.tasks
-
-        self.content = replace.to_string(indentLevel=0, title=False)
-
+        # NODES KEEP THEIR IDENTITY THROUGH EDITS, SORTS AND TIDIES, SO THE
+        # TASK IS ALWAYS READ DIRECTLY FROM THE DOCUMENT'S PARSED TREE
         return None
 
     @property
@@ -1491,6 +2748,8 @@ class project(baseClass):
             self):
         """*Refreshs this project's attributes if, for example, the parent document's projects or tasks has been sorted*
 
+        The nodes behind taskpaper objects keep their identity through any change to the document, so objects are always up to date and refreshing them is a no-op (kept for backwards compatibility).
+
         **Usage:**
 
             To refresh the project:
@@ -1500,32 +2759,9 @@ class project(baseClass):
                 myProject.refresh
         """
 
-        if self.parent:
-            self.parent.refresh
-        title = self.title
-        replace = self.parent.get_project(title)
-        if not replace:
-            return
-        self.tags = replace.tags
-        self.tasks = replace.tasks
-        self.notes = replace.notes
-        try:
-            title = self.title
-            replace = self.parent.get_project(title)
-            self.tags = replace.tags
-            self.tasks = replace.tasks
-            self.notes = replace.notes
-        except:
-            pass
-        self.projects = replace.projects
-        try:
-            self.projects = replace.projects
-        except:
-            pass
-
-        self.content = replace.to_string(indentLevel=0, title=False)
-
-        return
+        # NODES KEEP THEIR IDENTITY THROUGH EDITS, SORTS AND TIDIES, SO THE
+        # PROJECT IS ALWAYS READ DIRECTLY FROM THE DOCUMENT'S PARSED TREE
+        return None
 
     def delete(
         self
@@ -1542,23 +2778,31 @@ class project(baseClass):
                 myProject.delete()
         """
 
-        projectTitle = self.title
-        theseProjects = self.parent.projects[:]
-        for p in theseProjects:
-            if p.title == projectTitle:
-                theseProjects.remove(p)
-                break
-        self.parent.projects = theseProjects
-
-        doc = self
-        while doc:
-            if not doc.parent:
-                break
-            else:
-                doc = doc.parent
-
-        doc.content = doc.to_string(indentLevel=0, title=False)
-
+        self.refresh
+        # OBJECTS THAT ARE NO LONGER PART OF THE DOCUMENT CAN NOT BE EDITED
+        if not self._is_attached():
+            return None
+        self._get_document()._flush_edits()
+
+        node = self.meta
+        root = _node_root(node)
+        start = _node_start(node)
+        end = start + node.length
+
+        # SPLICE THE PROJECT OUT OF THE DOCUMENT
+        atEnd = end == len(root.buffer) and root.buffer[-1:] != "\n"
+        _index_nodes(root, node, add=False)
+        oldText = root.buffer[start:end]
+        _splice_text(root, start, end, "")
+        parent = node.parent
+        index = _child_index(parent, node)
+        del parent.children[index]
+        _resize_node(parent, start - end, childIndex=index)
+        _detach_node(node, oldText)
+        if atEnd:
+            _unterminate_text(root)
+
+        self.parent._bump_generation()
         return None
 
 
@@ -1609,6 +2853,9 @@ class note(baseClass):
     def sort_tasks(self):
         raise AttributeError("note object has no 'sort_tasks' method")
 
+    def sort(self):
+        raise AttributeError("note object has no 'sort' method")
+
     def add_project(self):
         raise AttributeError("note object has no 'add_project' method")
 
@@ -0,0 +1,78 @@
+import os
+import nose
+import unittest
+import codecs
+from tastic.utKit import utKit
+
+from fundamentals import tools
+
+su = tools(
+    arguments={"settingsFile": None},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName="tastic"
+)
+arguments, settings, log, dbConn = su.setup()
+
+
+# SETUP AND TEARDOWN FIXTURE FUNCTIONS FOR THE ENTIRE MODULE
+moduleDirectory = os.path.dirname(__file__)
+utKit = utKit(moduleDirectory)
+log, dbConn, pathToInputDir, pathToOutputDir = utKit.setupModule()
+utKit.tearDownModule()
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_atomicfile(unittest.TestCase):
+
+    def test_atomic_write_function(self):
+
+        from tastic.commonutils.atomicfile import atomic_write
+        filepath = pathToOutputDir + "/atomic.txt"
+        writeFile = open(filepath, 'w')
+        writeFile.write("old content")
+        writeFile.close()
+        os.chmod(filepath, 0o640)
+
+        # THE FILE IS REPLACED WHOLE AND KEEPS ITS PERMISSIONS
+        atomic_write(filepath, lambda writeFile: writeFile.write(u"new \u2713"))
+        assert codecs.open(filepath, encoding='utf-8').read() == u"new \u2713"
+        assert os.stat(filepath).st_mode & 0o777 == 0o640
+
+        # A FAILED WRITE LEAVES THE OLD FILE (AND NO TEMPORARY FILE) BEHIND
+        def failingWrite(writeFile):
+            writeFile.write(u"partial")
+            raise IOError("disk full")
+        self.assertRaises(IOError, atomic_write, filepath, failingWrite)
+        assert codecs.open(filepath, encoding='utf-8').read() == u"new \u2713"
+        assert not [f for f in os.listdir(pathToOutputDir) if f.startswith(".atomic.txt")]
+
+        return
+
+    def test_atomic_write_symlink_function(self):
+
+        from tastic.commonutils.atomicfile import atomic_write
+        targetDir = pathToOutputDir + "/atomic-target"
+        if not os.path.exists(targetDir):
+            os.makedirs(targetDir)
+        target = targetDir + "/t.taskpaper"
+        writeFile = open(target, 'w')
+        writeFile.write("old content")
+        writeFile.close()
+        link = pathToOutputDir + "/atomic-link.taskpaper"
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(target, link)
+
+        # WRITING THROUGH A SYMLINK UPDATES ITS TARGET AND KEEPS THE LINK
+        atomic_write(link, lambda writeFile: writeFile.write(u"new content"))
+        assert os.path.islink(link)
+        assert os.path.realpath(link) == os.path.realpath(target)
+        assert codecs.open(target, encoding='utf-8').read() == u"new content"
+        assert not [f for f in os.listdir(pathToOutputDir) if f.startswith(".atomic-link")]
+
+        return
@@ -0,0 +1,55 @@
+import os
+import nose
+import unittest
+from tastic.utKit import utKit
+
+from fundamentals import tools
+
+su = tools(
+    arguments={"settingsFile": None},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName="tastic"
+)
+arguments, settings, log, dbConn = su.setup()
+
+
+# SETUP AND TEARDOWN FIXTURE FUNCTIONS FOR THE ENTIRE MODULE
+moduleDirectory = os.path.dirname(__file__)
+utKit = utKit(moduleDirectory)
+log, dbConn, pathToInputDir, pathToOutputDir = utKit.setupModule()
+utKit.tearDownModule()
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_discovery(unittest.TestCase):
+
+    def test_find_files_function(self):
+
+        from tastic.commonutils.discovery import find_files
+        import shutil
+        root = pathToOutputDir + "/discovery"
+        if os.path.exists(root):
+            shutil.rmtree(root)
+        for d in ["a/b", ".git/objects", "node_modules/pkg", "_sync", "old-stuff"]:
+            os.makedirs(root + "/" + d)
+        for f in ["top.taskpaper", "notes.txt", "a/one.taskpaper", "a/b/two.taskpaper", "a/b/skip-me.taskpaper", ".git/objects/x.taskpaper", "node_modules/pkg/y.taskpaper", "_sync/index.taskpaper", "old-stuff/z.taskpaper"]:
+            open(root + "/" + f, "w").close()
+        os.symlink(root + "/a", root + "/link-to-a")
+
+        # FILES COME OUT LIKE ``os.walk`` WOULD LIST THEM, BUT WITHOUT THE IGNORED DIRECTORIES (OR SYMLINKED ONES)
+        found = find_files(root, ignore=[".git", "node_modules", "old-*", "a/b/skip-*"],
+                           ignorePaths=[root + "/_sync/"])
+        assert not isinstance(found, list)
+        assert [f.replace(root + "/", "") for f in found] == [
+            "top.taskpaper", "a/one.taskpaper", "a/b/two.taskpaper"]
+
+        # THE DEFAULT IGNORES SKIP VERSION CONTROL AND NODE FOLDERS
+        assert [f.replace(root + "/", "") for f in find_files(root)] == [
+            "top.taskpaper", "_sync/index.taskpaper", "a/one.taskpaper", "a/b/skip-me.taskpaper", "a/b/two.taskpaper", "old-stuff/z.taskpaper"]
+
+        return
@@ -0,0 +1,57 @@
+import os
+import nose
+import unittest
+from tastic.utKit import utKit
+
+from fundamentals import tools
+
+su = tools(
+    arguments={"settingsFile": None},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName="tastic"
+)
+arguments, settings, log, dbConn = su.setup()
+
+
+# SETUP AND TEARDOWN FIXTURE FUNCTIONS FOR THE ENTIRE MODULE
+moduleDirectory = os.path.dirname(__file__)
+utKit = utKit(moduleDirectory)
+log, dbConn, pathToInputDir, pathToOutputDir = utKit.setupModule()
+utKit.tearDownModule()
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_fingerprint(unittest.TestCase):
+
+    def test_file_fingerprint_function(self):
+
+        from tastic.commonutils.fingerprint import file_fingerprint
+        filepath = pathToOutputDir + "/fingerprint.txt"
+        writeFile = open(filepath, 'w')
+        writeFile.write("some content")
+        writeFile.close()
+        os.utime(filepath, (1000000000, 1000000000))
+
+        fingerprint = file_fingerprint(filepath)
+        assert fingerprint[:2] == (12, 1000000000)
+
+        # AN UNCHANGED FILE IS NOT READ AGAIN, A TOUCHED ONE KEEPS ITS CONTENT HASH
+        assert file_fingerprint(filepath, (12, 1000000000, "not read")) == (
+            12, 1000000000, "not read")
+        os.utime(filepath, (1000000100, 1000000100))
+        assert file_fingerprint(filepath, fingerprint)[2] == fingerprint[2]
+
+        # A CHANGED FILE GETS A NEW CONTENT HASH, A MISSING ONE NO FINGERPRINT
+        writeFile = open(filepath, 'w')
+        writeFile.write("other content")
+        writeFile.close()
+        assert file_fingerprint(filepath, fingerprint)[2] != fingerprint[2]
+        os.remove(filepath)
+        assert file_fingerprint(filepath, fingerprint) is None
+
+        return
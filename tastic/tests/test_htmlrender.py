@@ -0,0 +1,71 @@
+import os
+import unittest
+from tastic.utKit import utKit
+
+from fundamentals import tools
+
+su = tools(
+    arguments={"settingsFile": None},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName="tastic"
+)
+arguments, settings, log, dbConn = su.setup()
+
+
+# SETUP AND TEARDOWN FIXTURE FUNCTIONS FOR THE ENTIRE MODULE
+moduleDirectory = os.path.dirname(__file__)
+utKit = utKit(moduleDirectory)
+log, dbConn, pathToInputDir, pathToOutputDir = utKit.setupModule()
+utKit.tearDownModule()
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_htmlrender(unittest.TestCase):
+
+    def test_escape_function(self):
+
+        from tastic.workspace.htmlrender import escape
+        assert escape(u'- fix <div> & "span" tags') == u"- fix &lt;div&gt; &amp; &quot;span&quot; tags"
+        assert escape(u"it's > \"that\"", quote=False) == u"it's &gt; \"that\""
+
+        return
+
+    def test_write_html_page_function(self):
+
+        from StringIO import StringIO
+        from tastic.tastic import document
+        from tastic.workspace.htmlrender import write_html_page, read_page_template
+        doc = document.from_string(
+            "- fix <div> & co @next @id(abc)\n\t/path/to/a.taskpaper > home\n\ta <b> note\n\t- a subtask @id(def)\n- lone @next\n\t/path/to/b.taskpaper\n")
+
+        sink = StringIO()
+        write_html_page(sink, doc.tasks, title=u"w&co", setName=u"next",
+                        retag=lambda tags: [t for t in tags if not t.startswith("id(")])
+        html = sink.getvalue()
+        assert html.startswith(u"<h1>w&amp;co tasks</h1><ul>\n")
+        assert u"""<span class="parent">a &gt; home</span>""" in html
+        assert u"""<a href="dryx-open:///path/to/a.taskpaper"><span class="bullet next">""" in html
+        assert u"""fix &lt;div&gt; &amp; co <span class="next tag">@next</span>""" in html
+        assert u"""\n\t<br><span class="notes">a &lt;b&gt; note</span>\n\t\t</br><span class="notes">- a subtask\n\t</span></li>\n""" in html
+        assert u"""lone <span class="next tag">@next</span></li>\n</ul>""" in html
+        assert u"id(" not in html
+
+        # A TEMPLATE WITH A PLACEHOLDER FOR THE TASKS (OTHER % SIGNS ARE LEFT ALONE)
+        templatePath = pathToOutputDir + "/template.html"
+        writeFile = open(templatePath, "w")
+        writeFile.write(
+            "<style>p {width: 100%}</style><h2>%(setName)s</h2><ol>%(tasks)s</ol>")
+        writeFile.close()
+        sink = StringIO()
+        write_html_page(sink, doc.tasks[1:], template=read_page_template(
+            templatePath), setName=u"next")
+        assert sink.getvalue().startswith(
+            u"<style>p {width: 100%}</style><h2>next</h2><ol><li ")
+        assert sink.getvalue().endswith(u"</li>\n</ol>")
+
+        return
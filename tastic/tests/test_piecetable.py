@@ -0,0 +1,58 @@
+import os
+import nose
+import unittest
+import codecs
+from tastic.utKit import utKit
+
+from fundamentals import tools
+
+su = tools(
+    arguments={"settingsFile": None},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName="tastic"
+)
+arguments, settings, log, dbConn = su.setup()
+
+
+# SETUP AND TEARDOWN FIXTURE FUNCTIONS FOR THE ENTIRE MODULE
+moduleDirectory = os.path.dirname(__file__)
+utKit = utKit(moduleDirectory)
+log, dbConn, pathToInputDir, pathToOutputDir = utKit.setupModule()
+utKit.tearDownModule()
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+
+class test_piecetable(unittest.TestCase):
+
+    def test_piecetable_function(self):
+
+        from tastic.commonutils.piecetable import piecetable
+        text = u"project:\n\t- a task\n\t- another task"
+        buffer = piecetable(text)
+
+        # INSERT, REPLACE AND DELETE SPANS, MIRRORING THE EDITS ON A PLAIN STRING
+        for start, end, newText in [(18, 18, u" @due"), (0, 7, u"renamed project"), (len(text) - 4, len(text) + 16, u""), (0, 0, u"a note\n")]:
+            buffer.splice(start, end, newText)
+            text = text[:start] + newText + text[end:]
+            assert len(buffer) == len(text)
+            assert buffer[3:30] == text[3:30]
+            assert buffer[-1] == text[-1]
+
+        assert unicode(buffer) == text
+
+        # STREAM THE BUFFER TO A FILE
+        buffer.splice(5, 5, u"!")
+        text = text[:5] + u"!" + text[5:]
+        writeFile = codecs.open(
+            pathToOutputDir + "/piecetable.txt", encoding='utf-8', mode='w')
+        buffer.write(writeFile)
+        writeFile.close()
+        assert codecs.open(pathToOutputDir + "/piecetable.txt",
+                           encoding='utf-8').read() == text
+
+        return
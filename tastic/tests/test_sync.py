@@ -0,0 +1,255 @@
+import os
+import shutil
+import unittest
+from tastic.utKit import utKit
+
+from fundamentals import tools
+
+su = tools(
+    arguments={"settingsFile": None},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName="tastic"
+)
+arguments, settings, log, dbConn = su.setup()
+
+
+# SETUP AND TEARDOWN FIXTURE FUNCTIONS FOR THE ENTIRE MODULE
+moduleDirectory = os.path.dirname(__file__)
+utKit = utKit(moduleDirectory)
+log, dbConn, pathToInputDir, pathToOutputDir = utKit.setupModule()
+utKit.tearDownModule()
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+settings = {
+    "workflowTags": "@due, @flag, @hold, @next, @someday, @wait",
+    "syncTagSets": {"flagged": "flag, due", "next": "next"}
+}
+
+
+def new_sync(
+        root,
+        **extraSettings):
+    """*a sync object for the workspace copied to ``root``, syncing into its sync folder*"""
+    from tastic.workspace import sync
+    theseSettings = dict(settings)
+    theseSettings["syncTagSets"] = dict(settings["syncTagSets"])
+    theseSettings.update(extraSettings)
+    return sync(
+        log=log,
+        settings=theseSettings,
+        workspaceRoot=root + "/ws",
+        workspaceName="work",
+        syncFolder=root + "/sync"
+    )
+
+
+def run_sync(
+        root,
+        jobs=1,
+        **extraSettings):
+    """*sync the workspace copied to ``root``, returning the sync object*"""
+    tp = new_sync(root, **extraSettings)
+    tp.sync(jobs=jobs)
+    return tp
+
+
+def read_file(
+        filepath):
+    """*the content of a file*"""
+    readFile = open(filepath)
+    content = readFile.read()
+    readFile.close()
+    return content
+
+
+def complete_in_index(
+        indexPath,
+        tasks):
+    """*mark tasks of an index document done, given as ``(title, source filename)`` tuples*"""
+    from tastic.tastic import document
+    index = document.open(indexPath)
+    for t in index.tasks:
+        source = os.path.basename(t.notes[0].title.split(" > ")[0])
+        if (t.title[2:], source) in tasks:
+            t.add_tag("@done")
+    index.save()
+
+
+class test_sync(unittest.TestCase):
+
+    def test_complete_original_tasks_function(self):
+
+        root = utKit.copy_workspace("sync-complete", subdir="ws")
+        lists = root + "/ws/lists/"
+        run_sync(root)
+
+        # TWO TASKS FROM ONE FILE AND ONE FROM A FILE THAT IS EDITED BEFORE THE NEXT SYNC
+        complete_in_index(root + "/sync/work-flagged-tasks.taskpaper", [
+            ("do get hair cut", "saturday-tasks.taskpaper"),
+            ("put up shelves in living room", "saturday-tasks.taskpaper"),
+            ("act on changes found in albertos content validation report", "ssdr3.taskpaper")])
+        content = read_file(lists + "ssdr3.taskpaper")
+        writeFile = open(lists + "ssdr3.taskpaper", "w")
+        writeFile.write("a new project:\n\t- a new task\n" + content)
+        writeFile.close()
+        run_sync(root)
+
+        saturday = read_file(lists + "saturday-tasks.taskpaper")
+        assert "- do get hair cut @done(" in saturday
+        assert "- put up shelves in living room @done(" in saturday
+        assert "- watch a couple of youtube videos about putting up a fence @flag" in saturday
+        ssdr3 = read_file(lists + "ssdr3.taskpaper")
+        assert "- act on changes found in albertos content validation report @done(" in ssdr3
+        assert "a new project:\n\t- a new task\n" in ssdr3
+
+        # THE SAME TASK IN ANOTHER FILE IS LEFT ALONE
+        reminders = read_file(lists + "tasks_imported_from_reminders.taskpaper")
+        assert "- do get hair cut @due" in reminders
+        assert "- put up shelves in living room @flag" in reminders
+
+        # AND THE COMPLETED TASKS HAVE LEFT THE INDEX
+        index = read_file(root + "/sync/work-flagged-tasks.taskpaper")
+        assert index.count("- do get hair cut") == 1
+        assert "albertos content validation" not in index
+        assert "@done" not in index
+
+        return
+
+    def test_sync_cache_function(self):
+
+        root = utKit.copy_workspace("sync-cache", subdir="ws")
+        cacheDirectory = root + "/cache"
+        edited = root + "/ws/lists/saturday-tasks.taskpaper"
+
+        def counted_sync():
+            # RECORD THE FILES THE SYNC EXTRACTS THE TAGGED TASKS OF
+            tp = new_sync(root, cacheDirectory=cacheDirectory)
+            extracted = []
+            extract = tp._get_tagged_entries_from_taskpaper_file
+
+            def counting_extract(filepath, *args, **kwargs):
+                extracted.append(filepath)
+                return extract(filepath, *args, **kwargs)
+            tp._get_tagged_entries_from_taskpaper_file = counting_extract
+            tp.sync()
+            return tp, extracted
+
+        # A COLD SYNC EXTRACTS EVERY FILE AND RECORDS THEM ALL IN THE CACHE
+        tp, extracted = counted_sync()
+        taskpaperFiles = tp._get_all_taskpaper_files(root + "/ws")
+        assert extracted == taskpaperFiles
+        files = tp._read_sync_cache()["files"]
+        assert sorted(files.keys()) == sorted(taskpaperFiles)
+        outputs = [root + "/sync/work-%s-tasks.%s" % (s, e)
+                   for s in ["flagged", "next"] for e in ["taskpaper", "html"]]
+        for o in outputs:
+            os.utime(o, (1000000000, 1000000000))
+
+        # A WARM SYNC EXTRACTS NOTHING AND LEAVES THE OUTPUTS ALONE
+        tp, extracted = counted_sync()
+        assert extracted == []
+        for o in outputs:
+            assert os.path.getmtime(o) == 1000000000
+
+        # EDITING ONE FILE ONLY INVALIDATES ITS OWN CACHE ENTRY AND THE INDEX IT FEEDS
+        writeFile = open(edited, "a")
+        writeFile.write("\n- buy a new hose @flag\n")
+        writeFile.close()
+        tp, extracted = counted_sync()
+        assert extracted == [edited]
+        newFiles = tp._read_sync_cache()["files"]
+        for f in taskpaperFiles:
+            if f == edited:
+                assert newFiles[f] != files[f]
+            else:
+                assert newFiles[f] == files[f]
+        assert "- buy a new hose @flag" in read_file(outputs[0])
+        assert os.path.getmtime(outputs[0]) != 1000000000
+        assert os.path.getmtime(outputs[1]) != 1000000000
+        assert os.path.getmtime(outputs[2]) == 1000000000
+        assert os.path.getmtime(outputs[3]) == 1000000000
+
+        # THE INDEX MATCHES THE ONE A COLD SYNC WRITES
+        warmIndex = read_file(outputs[0])
+        shutil.rmtree(cacheDirectory)
+        shutil.rmtree(root + "/sync")
+        run_sync(root)
+        assert read_file(outputs[0]) == warmIndex
+
+        return
+
+    def test_parallel_sync_function(self):
+
+        root = utKit.copy_workspace("sync-parallel", subdir="ws")
+
+        def sync_outputs(jobs):
+            if os.path.exists(root + "/sync"):
+                shutil.rmtree(root + "/sync")
+            run_sync(root, jobs=jobs)
+            return dict((f, read_file(root + "/sync/" + f)) for f in os.listdir(root + "/sync"))
+
+        # THE INDEXES AND PAGES ARE THE SAME WHATEVER THE NUMBER OF PROCESSES (0 FOR ONE PER CPU)
+        serial = sync_outputs(1)
+        assert sorted(serial.keys()) == [
+            "work-flagged-tasks.html", "work-flagged-tasks.taskpaper", "work-next-tasks.html", "work-next-tasks.taskpaper"]
+        assert sync_outputs(3) == serial
+        assert sync_outputs(0) == serial
+
+        return
+
+    def test_task_ids_function(self):
+
+        import re
+        root = utKit.copy_workspace("sync-task-ids", subdir="ws")
+        checklist = root + "/ws/checklists/daily-review.taskpaper"
+        writeFile = open(checklist, "w")
+        writeFile.write(
+            "- check email @next\n\tmorning\n- check email @next\n\tevening\n")
+        writeFile.close()
+        taskpaperFiles = new_sync(root)._get_all_taskpaper_files(root + "/ws")
+        originals = dict((f, read_file(f)) for f in taskpaperFiles)
+
+        # WITHOUT THE SETTING THE ORIGINAL FILES ARE NEVER STAMPED
+        run_sync(root)
+        for f in taskpaperFiles:
+            assert read_file(f) == originals[f]
+        assert "@id(" not in read_file(root + "/sync/work-next-tasks.taskpaper")
+
+        # WITH IT EVERY INDEXED TASK GETS AN ID OF ITS OWN, STABLE ACROSS SYNCS
+        run_sync(root, syncTaskIds=True)
+        stamped = dict((f, read_file(f)) for f in taskpaperFiles)
+        ids = re.findall(r"@id\(([0-9a-f]+)\)", read_file(checklist))
+        assert len(ids) == 2 and ids[0] != ids[1]
+        index = read_file(root + "/sync/work-next-tasks.taskpaper")
+        run_sync(root, syncTaskIds=True)
+        for f in taskpaperFiles:
+            assert read_file(f) == stamped[f]
+        assert read_file(root + "/sync/work-next-tasks.taskpaper") == index
+        for i in ids:
+            assert "@id(%s)" % (i,) in index
+
+        # THE IDS ARE HIDDEN FROM THE HTML PAGES
+        for setName in ["flagged", "next"]:
+            assert "id(" not in read_file(
+                root + "/sync/work-%s-tasks.html" % (setName,))
+
+        # COMPLETING THE SECOND OF TWO IDENTICAL TASKS COMPLETES THAT ONE IN ITS FILE
+        from tastic.tastic import document
+        indexDoc = document.open(root + "/sync/work-next-tasks.taskpaper")
+        for t in indexDoc.tasks:
+            if "evening" in [n.title.strip() for n in t.notes]:
+                t.add_tag("@done")
+        indexDoc.save()
+        run_sync(root, syncTaskIds=True)
+        lines = read_file(checklist).split("\n")
+        assert lines[0] == "- check email @next @id(%s)" % (ids[0],)
+        assert lines[1] == "\tmorning"
+        assert lines[2].startswith("- check email @done(")
+        assert lines[3] == "\tevening"
+
+        return
@@ -231,6 +231,441 @@ class test_tastic(unittest.TestCase):
 
         return
 
+    def test_parse_function(self):
+
+        # READ IN A TASKPAPER FILE
+        from tastic.tastic import document
+        taskpaperFile = pathToOutputDir + "/saturday-tasks.taskpaper"
+        doc = document(taskpaperFile)
+
+        # THE WHOLE TREE IS BUILT FROM A SINGLE PARSE OF THE DOCUMENT
+        gardenProject = doc.get_project("tidy the garden")
+        subProjects = [p.title for p in gardenProject.projects]
+        assert subProjects == [
+            "build bbq:", "cut the grass:", "replace hedge with fence:"]
+        fenceProject = gardenProject.projects[2]
+        assert [p.title for p in fenceProject.projects] == [
+            "buy fence materials:"]
+        assert [n.title for n in fenceProject.notes] == [
+            "the hedge at the rear of the garden"]
+        rainTask = doc.get_task("has it stopped raining yet")
+        assert rainTask.tags == ["hold"]
+        assert rainTask.notes[0].title == "you can check the weather here: http://forecast.io/"
+
+        # NODES HOLD SPANS INTO THE DOCUMENT BUFFER, NOT COPIES OF THE TEXT
+        assert not hasattr(rainTask.meta, "__dict__")
+        rainTask.add_tag("@flag")
+        assert rainTask.meta.tagString == "@hold @flag"
+        assert rainTask.title == "- has it stopped raining yet"
+
+        return
+
+    def test_child_cache_function(self):
+
+        # READ IN A TASKPAPER FILE
+        from tastic.tastic import document
+        taskpaperFile = pathToOutputDir + "/saturday-tasks.taskpaper"
+        doc = document(taskpaperFile)
+        doc.tidy()
+
+        # UNCHANGED OBJECTS HAND BACK THE SAME CHILDREN
+        coffeeProject = doc.get_project("make coffee")
+        assert coffeeProject.tasks[0] is coffeeProject.tasks[0]
+        generation = doc.generation
+        coffeeProject.refresh
+        doc.refresh
+        assert doc.generation == generation
+
+        # A CHANGE REBUILDS THE CHILDREN OF THE CHANGED OBJECT AND ITS ANCESTORS
+        firstTask = coffeeProject.tasks[0]
+        firstTask.add_tag("@cached")
+        assert doc.generation > generation
+        assert coffeeProject.tasks[0].meta is firstTask.meta
+        assert "cached" in coffeeProject.tasks[0].tags
+        assert "cached" in doc.get_project("make coffee").tasks[0].tags
+
+        return
+
+    def test_splice_function(self):
+
+        # TWO PROJECTS CONTAINING IDENTICAL TASKS
+        taskpaperFile = pathToOutputDir + "/splice.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write(
+            "first:\n\t- same task @due\n\n\nsecond:\n\t- same task @due")
+        writeFile.close()
+        from tastic.tastic import document
+        doc = document(taskpaperFile)
+
+        # ONLY THE SPAN OF THE EDITED OBJECT CHANGES
+        secondTask = doc.get_project("second").tasks[0]
+        secondTask.add_tag("@flag")
+        assert doc.content == "first:\n\t- same task @due\n\n\nsecond:\n\t- same task @due @flag"
+        secondTask.del_tag("@due")
+        assert doc.content == "first:\n\t- same task @due\n\n\nsecond:\n\t- same task @flag"
+        secondTask.add_note("a note")
+        doc.get_project("first").add_task("another task")
+        assert doc.content == "first:\n\t- same task @due\n\t- another task\n\n\nsecond:\n\t- same task @flag\n\t\ta note"
+        doc.get_project("first").delete()
+        assert doc.content == "second:\n\t- same task @flag\n\t\ta note"
+
+        # THE NEWEST NOTE IS LISTED FIRST
+        secondTask.add_note("a newer note")
+        assert doc.content == "second:\n\t- same task @flag\n\t\ta newer note\n\t\ta note"
+        assert secondTask.notes[0].title == "a newer note"
+
+        return
+
+    def test_tag_index_function(self):
+
+        taskpaperFile = pathToOutputDir + "/tag_index.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write(
+            "first: @due(today)\n\t- one @flag\n\t\t- two @due(today)\n\t- three\n\tnested:\n\t\t- four @FLAG\nsecond: @due")
+        writeFile.close()
+        from tastic.tastic import document
+        doc = document(taskpaperFile)
+
+        # TAG QUERIES ARE ANSWERED FROM THE INDEX, BY NAME OR NAME AND VALUE
+        assert [t.title for t in doc.tagged_tasks("@flag")] == [
+            "- one", "- four"]
+        assert [p.title for p in doc.tagged_projects("due")] == [
+            "first:", "second:"]
+        assert [p.title for p in doc.tagged_projects("@due(today)")] == [
+            "first:"]
+        firstProject = doc.get_project("first")
+        assert firstProject.tagged_tasks("due")[0] is firstProject.tasks[0].tasks[0]
+
+        # THE INDEX FOLLOWS EDITS TO THE DOCUMENT
+        doc.get_task("three").add_tag("@flag")
+        doc.get_task("one").del_tag("@flag")
+        firstProject.add_task("five", "@flag")
+        assert [t.title for t in doc.tagged_tasks("flag")] == [
+            "- three", "- five", "- four"]
+        firstProject.get_project("nested").delete()
+        assert [t.title for t in doc.tagged_tasks("flag")] == [
+            "- three", "- five"]
+        doc.sort_projects("@due")
+        assert [t.title for t in doc.tagged_tasks("flag")] == [
+            "- three", "- five"]
+
+        return
+
+    def test_title_index_function(self):
+
+        taskpaperFile = pathToOutputDir + "/title_index.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write(
+            "parent project:\n\tmake coffee:\n\t\t- boil the kettle\n\t- boil the kettle @hot\nmake coffee:\n\t- boil the kettle")
+        writeFile.close()
+        from tastic.tastic import document
+        doc = document(taskpaperFile)
+
+        # NEAREST MATCHES ARE FOUND FIRST, EVERY MATCH ON REQUEST
+        assert doc.get_project("Make Coffee").parent is doc
+        assert doc.get_project("parent project / make coffee").parent.title == "parent project:"
+        assert len(doc.get_project("make coffee", allMatches=True)) == 2
+        parentProject = doc.get_project("parent project")
+        assert parentProject.get_task("boil the kettle").tags == ["hot"]
+        assert len(parentProject.get_task(
+            "boil the kettle", allMatches=True)) == 2
+        assert doc.get_task("nothing") is None
+        assert doc.get_project("nothing", allMatches=True) == []
+
+        # A STALE OBJECT IS MATCHED TO THE SAME ONE OF ITS DUPLICATES
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write(
+            "project:\n\t- same @due(1)\n\t- same @flag\n\t- other @due(2)")
+        writeFile.close()
+        doc = document(taskpaperFile)
+        secondTask = doc.get_project("project").tasks[1]
+        doc.sort_tasks("@due @flag")
+        secondTask.refresh
+        assert secondTask.tags == ["flag"]
+
+        return
+
+    def test_stable_identity_function(self):
+
+        taskpaperFile = pathToOutputDir + "/stable_identity.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write(
+            "project:\n\t- same @flag\n\t\tnote\n\t- same @due\n\tsub:\n\t\t- deep @due\nother: @due")
+        writeFile.close()
+        from tastic.tastic import document
+        doc = document(taskpaperFile)
+
+        # OBJECTS HANDED OUT BEFORE A SORT OR TIDY STILL POINT AT THE SAME NODES
+        aProject = doc.get_project("project")
+        flagTask, dueTask = aProject.tasks
+        node = flagTask.meta
+        deepTask = doc.get_task("deep")
+        doc.sort_projects("@due")
+        aProject.sort_tasks("@due @flag")
+        doc.tidy()
+        assert flagTask.meta is node
+        assert flagTask._is_attached() and deepTask._is_attached()
+        assert [t.meta for t in aProject.tasks] == [dueTask.meta, flagTask.meta]
+
+        # AND CAN STILL BE EDITED
+        flagTask.add_tag("@hot")
+        deepTask.done()
+        assert "- same @flag @hot\n\t\tnote" in doc.content
+        assert "- deep @done(" in doc.content
+
+        # ONLY A DELETED PROJECT IS CUT LOOSE
+        subProject = aProject.get_project("sub")
+        subProject.delete()
+        assert not deepTask._is_attached()
+        assert deepTask.title == "- deep"
+
+        return
+
+    def test_batch_function(self):
+
+        taskpaperFile = pathToOutputDir + "/batch.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write(
+            "project: @next\n\t- one @next\n\t\t- two @next\n\t- three\nother:\n\t- four @hold")
+        writeFile.close()
+        from tastic.tastic import document
+        doc = document(taskpaperFile)
+
+        # TAG CHANGES ARE HELD BACK UNTIL THE BATCH ENDS, BUT ARE SEEN AT ONCE
+        # THROUGH THE OBJECTS AND TAG QUERIES
+        original = doc.content
+        with doc.batch():
+            for t in doc.all_tasks() + [doc.get_project("project")]:
+                t.del_tag("@next")
+                t.add_tag("@flag")
+            assert doc.meta.buffer[:] == original
+            assert doc.get_task("two").tags == ["flag"]
+            assert len(doc.tagged_tasks("@flag")) == 4
+            assert doc.tagged_tasks("@next") == []
+        assert doc.content == "project: @flag\n\t- one @flag\n\t\t- two @flag\n\t- three @flag\nother:\n\t- four @hold @flag"
+
+        # READING THE TEXT OR CHANGING THE STRUCTURE WRITES THE HELD-BACK EDITS
+        with doc.batch():
+            doc.get_task("four").done()
+            doc.get_project("other").add_note("a note")
+            doc.get_task("one").set_tags("@a @b(c)")
+            assert doc.get_task("one").raw_content.startswith("- one @a @b(c)")
+        assert "other:\n\ta note\n\t- four @done(" in doc.content
+
+        return
+
+    def test_sort_function(self):
+
+        taskpaperFile = pathToOutputDir + "/sort.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write(
+            "b:\n\t- one\n\t- two @due(today)\n\t\t- three\n\t\t- four @Flag\n\ta note\n\tc: @flag\n\td: @due\na: @hold\n- five @flag @due")
+        writeFile.close()
+        from tastic.tastic import document
+        doc = document(taskpaperFile)
+        one = doc.get_task("one")
+
+        # TAGS RANK BY THEIR ORDER IN THE WORKFLOW; UNTAGGED OBJECTS KEEP THEIR
+        # ORDER AFTER THE TAGGED ONES
+        sortedTasks = doc.get_project("b").sort_tasks("@due(today), @flag")
+        assert [t.title for t in sortedTasks] == ["- two", "- one"]
+        assert [t.title for t in doc.get_task("two").tasks] == ["- four", "- three"]
+
+        # SORT TASKS AND PROJECTS IN A SINGLE REWRITE OF THE DOCUMENT
+        doc.sort(["@due", "@flag", "@hold"])
+        assert doc.content == "- five @flag @due\na: @hold\nb:\n\ta note\n\t- two @due(today)\n\t\t- four @Flag\n\t\t- three\n\t- one\n\td: @due\n\tc: @flag"
+        assert one._is_attached() and one.title == "- one"
+
+        return
+
+    def test_write_to_function(self):
+
+        from tastic.tastic import document
+        from StringIO import StringIO
+        import codecs
+        doc = document(pathToOutputDir + "/saturday-tasks.taskpaper")
+
+        # STREAM OBJECTS INTO ANY SINK; TO_STRING WRAPS THE SAME SERIALIZER
+        for thisObject in [doc, doc.projects[0], doc.tasks[0], doc.notes[0]]:
+            sink = StringIO()
+            thisObject.write_to(sink)
+            assert sink.getvalue() == thisObject.to_string()
+
+        writeFile = codecs.open(
+            pathToOutputDir + "/write_to.taskpaper", encoding='utf-8', mode='w')
+        doc.write_to(writeFile, indentLevel=0, title=False)
+        writeFile.close()
+        content = codecs.open(
+            pathToOutputDir + "/write_to.taskpaper", encoding='utf-8').read()
+        assert content == doc.to_string(indentLevel=0, title=False)
+        assert content.startswith("I need to review this document")
+        assert "\nmake coffee: @coffee @flag\n\t- scoop" in content
+
+        # NOTES AND TAGS CAN BE REWRITTEN ON THE WAY OUT, LEAVING THE TASKS UNTOUCHED
+        writeFile = open(pathToOutputDir + "/retag.taskpaper", 'w')
+        writeFile.write("project:\n\t- one @next\n\t\tA note\n\t\t- two @wait @flag\n")
+        writeFile.close()
+        doc = document(pathToOutputDir + "/retag.taskpaper")
+        task = doc.get_task("one")
+        content = task.to_string(notes=["path/to/file"] + task.notes,
+                                 retag=lambda tags: [t for t in tags if t != "next"] + ["due"])
+        assert content == "- one @due\n\tpath/to/file\n\tA note\n\t- two @wait @flag @due"
+        assert doc.content == "project:\n\t- one @next\n\t\tA note\n\t\t- two @wait @flag\n"
+
+        return
+
+    def test_save_function(self):
+
+        taskpaperFile = pathToOutputDir + "/save.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write("project:\n\t- one\n\t- two")
+        writeFile.close()
+        os.utime(taskpaperFile, (1000000000, 1000000000))
+        from tastic.tastic import document
+        doc = document(taskpaperFile)
+
+        # AN UNCHANGED DOCUMENT IS NOT WRITTEN
+        doc.save()
+        assert os.stat(taskpaperFile).st_mtime == 1000000000
+
+        # A CHANGED DOCUMENT IS WRITTEN, LEAVING NO TEMPORARY FILES BEHIND
+        doc.get_task("one").add_tag("@flag")
+        doc.save()
+        assert os.stat(taskpaperFile).st_mtime != 1000000000
+        assert open(taskpaperFile).read() == "project:\n\t- one @flag\n\t- two"
+        assert not [f for f in os.listdir(pathToOutputDir) if f.startswith(".save.taskpaper")]
+
+        # A FILE CHANGED BY SOMETHING ELSE SINCE IT WAS READ IS WRITTEN OVER
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write("- something else")
+        writeFile.close()
+        doc.save()
+        assert open(taskpaperFile).read() == "project:\n\t- one @flag\n\t- two"
+
+        return
+
+    def test_tree_cache_function(self):
+
+        taskpaperFile = pathToOutputDir + "/cached.taskpaper"
+        cacheDir = pathToOutputDir + "/cache"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write("project: @flag\n\t- one @due\n\t\t- two\n\ta note")
+        writeFile.close()
+        from tastic.tastic import document
+
+        # THE FIRST READ PARSES THE FILE AND CACHES THE TREE; THE SECOND READS
+        # THE TREE BACK FROM THE CACHE
+        doc = document(taskpaperFile, cacheDir=cacheDir)
+        assert len(os.listdir(cacheDir)) == 1
+        doc = document(taskpaperFile, cacheDir=cacheDir)
+        assert doc.get_task("two").parent.title == "- one"
+        assert doc.tagged_tasks("@due")[0].title == "- one"
+        assert doc.get_project("project").notes[0].title == "a note"
+
+        # SAVING A CHANGE UPDATES THE CACHE, AND A FILE CHANGED BEHIND THE
+        # CACHE'S BACK IS PARSED AFRESH
+        doc.get_project("project").add_task("three")
+        doc.save()
+        doc = document(taskpaperFile, cacheDir=cacheDir)
+        assert [t.title for t in doc.get_project("project").tasks] == ["- one", "- three"]
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write("other:\n\t- four")
+        writeFile.close()
+        doc = document(taskpaperFile, cacheDir=cacheDir)
+        assert doc.get_project("other").tasks[0].title == "- four"
+
+        return
+
+    def test_document_pool_function(self):
+
+        taskpaperFile = pathToOutputDir + "/pooled.taskpaper"
+        otherFile = pathToOutputDir + "/pooled-other.taskpaper"
+        for filepath in [taskpaperFile, otherFile]:
+            writeFile = open(filepath, 'w')
+            writeFile.write("project:\n\t- one")
+            writeFile.close()
+        from tastic.tastic import document
+        document.pool.clear()
+
+        # THE SAME DOCUMENT IS HANDED OUT WHILE IT MATCHES ITS FILE
+        doc = document.open(taskpaperFile)
+        assert document.open(taskpaperFile) is doc
+        doc.get_task("one").add_tag("@flag")
+        assert document.open(taskpaperFile) is not doc
+        doc = document.open(taskpaperFile)
+        doc.get_task("one").add_tag("@flag")
+        doc.save()
+        assert document.open(taskpaperFile) is doc
+
+        # A FILE CHANGED ON DISK IS READ AGAIN
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write("project:\n\t- one\n\t- two")
+        writeFile.close()
+        doc = document.open(taskpaperFile)
+        assert doc.get_task("two")
+
+        # THE LEAST RECENTLY USED DOCUMENTS ARE DROPPED
+        document.pool.resize(maxEntries=1)
+        other = document.open(otherFile)
+        assert other.get_task("one")
+        assert document.open(taskpaperFile) is not doc
+        assert document.open(otherFile) is not other
+        document.pool.resize(maxEntries=64)
+        document.pool.clear()
+
+        return
+
+    def test_copy_function(self):
+
+        taskpaperFile = pathToOutputDir + "/copied.taskpaper"
+        writeFile = open(taskpaperFile, 'w')
+        writeFile.write("project: @next\n\t- one @flag\n\t\tA note\nArchive:\n\t- old @done")
+        writeFile.close()
+        from tastic.tastic import document
+        doc = document.open(taskpaperFile)
+        original = doc.content
+
+        # EDITS TO THE COPY NEVER REACH THE ORIGINAL DOCUMENT
+        docCopy = doc._copy()
+        assert docCopy.content == original
+        docCopy.get_task("one").add_tag("@due")
+        docCopy.get_task("one").add_note("path/to/file")
+        docCopy.get_project("Archive").delete()
+        assert docCopy.content == "project: @next\n\t- one @flag @due\n\t\tpath/to/file\n\t\tA note"
+        assert doc.content == original
+        assert doc.get_task("one").tags == ["flag"]
+        assert document.open(taskpaperFile) is doc
+
+        return
+
+    def test_from_string_function(self):
+
+        from tastic.tastic import document
+        taskpaperFile = pathToOutputDir + "/from-string.taskpaper"
+        if os.path.exists(taskpaperFile):
+            os.remove(taskpaperFile)
+
+        # A DOCUMENT CAN BE BUILT, EDITED AND SORTED IN MEMORY, THEN SAVED ONCE
+        doc = document.from_string(
+            u"- later @someday\n- now @due\n    some note\nproject:\n\t- one", filepath=taskpaperFile)
+        assert [t.title for t in doc.tasks] == ["- later", "- now"]
+        assert doc.tasks[1].notes[0].title == "some note"
+        doc.sort_tasks("@due, @someday")
+        assert not os.path.exists(taskpaperFile)
+        doc.save()
+        assert open(taskpaperFile).read() == "- now @due\n\tsome note\n- later @someday\nproject:\n\t- one"
+        assert document(taskpaperFile).content == doc.content
+
+        # OR BUILT AROUND A TREE THAT HAS ALREADY BEEN PARSED
+        from tastic.tastic import _copy_tree
+        treeDoc = document.from_tree(_copy_tree(doc.meta))
+        treeDoc.get_task("now").done()
+        treeDoc.save(pathToOutputDir + "/from-tree.taskpaper")
+        assert "- now @done" in open(pathToOutputDir + "/from-tree.taskpaper").read()
+        assert doc.get_task("now").tags == ["due"]
+
+        return
+
     # def test_projects_function(self):
 
     #     # DOCUMENT LEVEL METHODS AND PROPERTIES
@@ -0,0 +1,102 @@
+import os
+import unittest
+from tastic.utKit import utKit
+
+from fundamentals import tools
+
+su = tools(
+    arguments={"settingsFile": None},
+    docString=__doc__,
+    logLevel="DEBUG",
+    options_first=False,
+    projectName="tastic"
+)
+arguments, settings, log, dbConn = su.setup()
+
+
+# SETUP AND TEARDOWN FIXTURE FUNCTIONS FOR THE ENTIRE MODULE
+moduleDirectory = os.path.dirname(__file__)
+utKit = utKit(moduleDirectory)
+log, dbConn, pathToInputDir, pathToOutputDir = utKit.setupModule()
+utKit.tearDownModule()
+
+# Recursively create missing directories
+if not os.path.exists(pathToOutputDir):
+    os.makedirs(pathToOutputDir)
+
+settings = {"workflowTags": "@due, @flag, @hold, @next, @someday, @wait"}
+
+
+class test_workspace(unittest.TestCase):
+
+    def test_failed_files_function(self):
+
+        from tastic.workspace import workspace
+        for jobs in [1, 2]:
+            root = utKit.copy_workspace("failing-workspace")
+            ws = workspace(
+                log=log,
+                settings=settings,
+                fileOrWorkspacePath=root
+            )
+
+            # A FILE THAT VANISHES AFTER THE WORKSPACE IS SCANNED FAILS, THE REST ARE STILL PROCESSED
+            missing = root + "/checklists/monthly-review.taskpaper"
+            os.remove(missing)
+            for results in [ws.sort(jobs=jobs), ws.archive_done(jobs=jobs)]:
+                assert [r[0] for r in results] == ws.taskpaperFiles
+                failed = [r for r in results if r[2]]
+                assert [r[0] for r in failed] == [missing]
+                assert "Traceback" in failed[0][2]
+                for taskpaperPath, seconds, error in results:
+                    assert seconds >= 0
+
+        return
+
+    def test_sort_manifest_function(self):
+
+        from tastic.workspace import workspace
+        from tastic.workspace.workspace import sortManifestName
+        root = utKit.copy_workspace("manifest-workspace")
+
+        def sort(settings):
+            ws = workspace(
+                log=log,
+                settings=settings,
+                fileOrWorkspacePath=root
+            )
+            return ws, [r[0] for r in ws.sort()]
+
+        # THE FIRST SORT SORTS EVERY FILE AND WRITES THE MANIFEST
+        ws, sorted1 = sort(settings)
+        assert sorted1 == ws.taskpaperFiles
+        assert os.path.exists(root + "/" + sortManifestName)
+
+        # A SECOND SORT SKIPS THE UNCHANGED FILES AND LEAVES THE MANIFEST ALONE
+        manifestPath = root + "/" + sortManifestName
+        os.utime(manifestPath, (1000000000, 1000000000))
+        ws, sorted2 = sort(settings)
+        assert sorted2 == []
+        assert os.path.getmtime(manifestPath) == 1000000000
+
+        # A FILE EDITED AFTER IT WAS SORTED IS SORTED AGAIN
+        edited = root + "/lists/saturday-tasks.taskpaper"
+        writeFile = open(edited, "a")
+        writeFile.write("\n- ring the plumber @due\n")
+        writeFile.close()
+        ws, sorted3 = sort(settings)
+        assert sorted3 == [edited]
+        assert os.path.getmtime(manifestPath) != 1000000000
+        content = open(edited).read()
+        assert content.index("- ring the plumber @due") < content.index(
+            "- invite friends over for drinks")
+
+        # CHANGING THE WORKFLOW TAGS RE-SORTS EVERY FILE
+        reordered = dict(settings)
+        reordered["workflowTags"] = "@flag, @due, @hold, @next, @someday, @wait"
+        ws, sorted4 = sort(reordered)
+        assert sorted4 == ws.taskpaperFiles
+        ws, sorted5 = sort(reordered)
+        assert sorted5 == []
+
+        return
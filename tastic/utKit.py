@@ -1,6 +1,8 @@
 """
 *Unit testing tools*
 """
+import os
+import shutil
 from fundamentals import utKit
 
 # OVERRIDES
@@ -59,3 +61,28 @@ class utKit(utKit):
          """
 
         return
+
+    def copy_workspace(
+            self,
+            name,
+            subdir=None):
+        """*copy the ``work`` workspace of the test input to a fresh folder in the output directory, adding the example taskpaper documents to its ``lists`` folder*
+
+        **Key Arguments:**
+            - ``name`` -- the name of the folder in the output directory
+            - ``subdir`` -- copy the workspace into this subfolder, leaving room for a sync folder alongside it. Default *None* (the folder is the workspace root)
+
+        **Return:**
+            - ``root`` -- the path of the new folder
+        """
+        root = os.path.join(self.pathToOutputDir, name)
+        if os.path.exists(root):
+            shutil.rmtree(root)
+        workspaceRoot = root
+        if subdir:
+            workspaceRoot = os.path.join(root, subdir)
+        shutil.copytree(os.path.join(self.pathToInputDir, "work"), workspaceRoot)
+        for filename in ["saturday-tasks.taskpaper", "ssdr3.taskpaper", "tasks_imported_from_reminders.taskpaper"]:
+            shutil.copyfile(os.path.join(self.pathToInputDir, filename),
+                            os.path.join(workspaceRoot, "lists", filename))
+        return root
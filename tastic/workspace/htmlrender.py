@@ -0,0 +1,237 @@
+#!/usr/local/bin/python
+# encoding: utf-8
+"""
+*Stream the HTML pages of sync index documents straight to their files*
+
+:Author:
+    David Young
+
+:Date Created:
+    October 18, 2026
+"""
+import os
+import re
+import codecs
+
+# THE PAGE TEMPLATE USED WHEN NO TEMPLATE IS GIVEN IN THE SETTINGS
+defaultPageTemplate = u"<h1>%(title)s tasks</h1><ul>\n%(tasks)s</ul>"
+
+# ONLY THESE PLACEHOLDERS ARE FILLED IN, SO ANY OTHER % IN A TEMPLATE (E.G. IN CSS) IS LEFT ALONE
+placeholderRegex = re.compile(r"%\((title|setName)\)s")
+
+
+def escape(
+        text,
+        quote=True):
+    """*escape text for use in an HTML page*
+
+    **Key Arguments:**
+        - ``text`` -- the text to escape
+        - ``quote`` -- also escape quotes, for text used within an attribute. Default *True*
+
+    **Return:**
+        - ``text`` -- the escaped text
+
+    **Usage:**
+
+        .. code-block:: python
+
+            from tastic.workspace.htmlrender import escape
+            print escape(u'- fix <div> & "span" tags')
+            > - fix &lt;div&gt; &amp; &quot;span&quot; tags
+    """
+    text = text.replace(u"&", u"&amp;").replace(
+        u"<", u"&lt;").replace(u">", u"&gt;")
+    if quote:
+        text = text.replace(u'"', u"&quot;").replace(u"'", u"&#39;")
+    return text
+
+
+def read_page_template(
+        templatePath=None):
+    """*read an HTML page template*
+
+    A template is an HTML page with a ``%(tasks)s`` placeholder where the list items of the tasks are streamed. It may also use ``%(title)s`` (the workspace name, or workspace name and source file of a page split by file) and ``%(setName)s`` (the name of the sync tag set).
+
+    **Key Arguments:**
+        - ``templatePath`` -- path to the template file. Default *None* (``defaultPageTemplate``)
+
+    **Return:**
+        - ``template`` -- the template
+    """
+    if not templatePath:
+        return defaultPageTemplate
+
+    templatePath = os.path.expanduser(templatePath)
+    try:
+        readFile = codecs.open(templatePath, encoding='utf-8', mode='r')
+    except IOError, e:
+        message = 'could not open the HTML template %s: %s' % (templatePath, e)
+        raise IOError(message)
+    template = readFile.read()
+    readFile.close()
+
+    if "%(tasks)s" not in template:
+        raise ValueError(
+            'the HTML template %s has no %%(tasks)s placeholder' % (templatePath,))
+    return template
+
+
+def write_html_page(
+        writeFile,
+        tasks,
+        template=None,
+        title=u"",
+        setName=u"",
+        retag=None):
+    """*stream an HTML page listing the tasks of a sync index to a file*
+
+    Each task is written as soon as it is rendered, so the page is never held in memory as a whole. Every piece of text taken from the tasks is escaped.
+
+    **Key Arguments:**
+        - ``writeFile`` -- the open file to write to (anything with a ``write`` method taking unicode)
+        - ``tasks`` -- the index tasks (each with the path of its source as its first note)
+        - ``template`` -- the page template (see ``read_page_template``). Default *None* (``defaultPageTemplate``)
+        - ``title`` -- the title of the page. Default *""*
+        - ``setName`` -- the name of the sync tag set. Default *""*
+        - ``retag`` -- a function mapping the list of tags of each task (and subtask) to the tags to show. Default *None*
+
+    **Usage:**
+
+        .. code-block:: python
+
+            from tastic.workspace.htmlrender import write_html_page
+            writeFile = codecs.open("/path/to/w-next-tasks.html", encoding='utf-8', mode='w')
+            write_html_page(writeFile, doc.tasks, title="myWorkspace", setName="next")
+            writeFile.close()
+    """
+    def write_tasks():
+        for task in tasks:
+            write_html_task(writeFile, task, retag=retag)
+
+    _write_template(writeFile, template, write_tasks,
+                    title=title, setName=setName)
+    return None
+
+
+def write_html_contents(
+        writeFile,
+        pages,
+        template=None,
+        title=u"",
+        setName=u""):
+    """*stream an HTML page linking to the pages an index has been split into*
+
+    **Key Arguments:**
+        - ``writeFile`` -- the open file to write to
+        - ``pages`` -- a list of ``(href, label, taskCount)`` tuples, one for each page
+        - ``template`` -- the page template (see ``read_page_template``). Default *None* (``defaultPageTemplate``)
+        - ``title`` -- the title of the page. Default *""*
+        - ``setName`` -- the name of the sync tag set. Default *""*
+    """
+    def write_links():
+        for href, label, taskCount in pages:
+            writeFile.write(u"""<li class="page"><a href="%s">%s</a> <span class="count">%s</span></li>\n""" % (
+                escape(href), escape(label), taskCount))
+
+    _write_template(writeFile, template, write_links,
+                    title=title, setName=setName)
+    return None
+
+
+def write_html_task(
+        writeFile,
+        task,
+        retag=None):
+    """*stream the list item of a single index task to a file*
+
+    The item shows the source file (and project) of the task, a bullet linking to the source file, the task with its tags and then the rest of its notes and its subtasks, one per line.
+
+    **Key Arguments:**
+        - ``writeFile`` -- the open file to write to
+        - ``task`` -- the index task (with the path of its source as its first note)
+        - ``retag`` -- a function mapping the list of tags of each task (and subtask) to the tags to show. Default *None*
+    """
+    tags = task.tags
+    if retag:
+        tags = retag(tags)
+
+    notes = task.notes
+    source = notes[0].title.split(" > ")
+    filepath = source[0]
+    basename = os.path.basename(filepath).replace(
+        ".taskpaper", "").replace("-", " ")
+    if len(source) > 1:
+        parent = u"%s > %s" % (basename, source[1])
+    else:
+        parent = basename
+
+    writeFile.write(u"""<li class="XXX"><span class="parent">%s</span></br>\n""" %
+                    (escape(parent, quote=False),))
+    writeFile.write(u"""<a href="dryx-open://%s"><span class="bullet %s">◉</span> </a>""" %
+                    (escape(filepath), escape(u" ".join(tags))))
+    writeFile.write(escape(task.title[2:], quote=False))
+    for t in tags:
+        writeFile.write(u""" <span class="%s tag">@%s</span>""" %
+                        (escape(t.split("(")[0]), escape(t, quote=False)))
+
+    # THE FIRST NOTE (THE SOURCE OF THE TASK) IS ALREADY SHOWN ABOVE THE TASK
+    lines = _body_lines(task, 0, retag)
+    next(lines, None)
+    opening = u"""\n\t<br><span class="notes">"""
+    for line in lines:
+        writeFile.write(opening + escape(line, quote=False))
+        opening = u"""</span>\n\t\t</br><span class="notes">"""
+    if opening != u"""\n\t<br><span class="notes">""":
+        writeFile.write(u"""\n\t</span>""")
+
+    writeFile.write(u"</li>\n")
+    return None
+
+
+def _write_template(
+        writeFile,
+        template,
+        writeBody,
+        **values):
+    """*stream a page template, calling ``writeBody`` to write the content at its ``%(tasks)s`` placeholder*"""
+    if template is None:
+        template = defaultPageTemplate
+    head, tail = template.split("%(tasks)s", 1)
+
+    def fill(match):
+        return escape(values[match.group(1)] or u"", quote=False)
+
+    writeFile.write(placeholderRegex.sub(fill, head))
+    writeBody()
+    writeFile.write(placeholderRegex.sub(fill, tail))
+    return None
+
+
+def _body_lines(
+        taskpaperObject,
+        depth,
+        retag=None):
+    """*yield the lines of the notes and subtasks nested within a task, as ``to_string`` would write them*
+
+    **Key Arguments:**
+        - ``taskpaperObject`` -- the task
+        - ``depth`` -- the indentation of the task's notes and subtasks
+        - ``retag`` -- a function mapping the list of tags of each subtask to the tags to show. Default *None*
+    """
+    indent = depth * u"\t"
+    for n in taskpaperObject.notes:
+        noteTitle = n.title.strip()
+        if len(noteTitle):
+            yield indent + noteTitle
+
+    for t in taskpaperObject.tasks:
+        tags = t.tags
+        if retag:
+            tags = retag(tags)
+        line = t.title
+        if len(tags):
+            line += u" @" + u" @".join(tags)
+        yield indent + line
+        for line in _body_lines(t, depth + 1, retag):
+            yield line
@@ -11,12 +11,27 @@
 """
 import sys
 import os
+import re
 import codecs
+import hashlib
+import marshal
+import logging
+import functools
+import collections
+import multiprocessing
 os.environ['TERM'] = 'vt100'
 import urllib
 from fundamentals import tools
 from tastic.tastic import document
-from fundamentals.files import recursive_directory_listing
+from tastic.commonutils.discovery import find_files, defaultIgnores
+from tastic.commonutils.fingerprint import file_fingerprint
+from tastic.commonutils.atomicfile import atomic_write
+from tastic.workspace.htmlrender import read_page_template, write_html_page, write_html_contents
+
+# BUMPED WHENEVER THE LAYOUT OF THE SYNC CACHE CHANGES
+syncCacheVersion = 1
+# THE TAG HOLDING THE ID OF A SYNCED TASK (SEE THE ``syncTaskIds`` SETTING)
+taskIdTag = "id"
 
 
 class sync():
@@ -52,6 +67,12 @@ class sync():
             tp.sync()
 
         After this it is simply a matter of running `tp.sync()` to sync the sync-tag set into a taskpaper document in the syncFolder called `<workspaceName>-synced-tasks.taskpaper`
+
+        With the ``syncTaskIds`` setting turned on every original task is stamped with a compact ``@id(...)`` tag the first time it is synced. The ID is carried into the index (and hidden from the HTML page), so a task completed in the index is marked done in its original file by ID, even when several tasks there share its title.
+
+        The HTML pages are streamed to their files through the ``htmlTemplate`` of the settings (if given). To keep the pages of huge indexes small, set ``htmlPages`` to *file* to split each index into one page per source file.
+
+        On a large workspace run `tp.sync(jobs=0)` to extract the tagged tasks of the workspace files in one process per CPU - the indexes are the same whatever the number of processes.
     """
     # INITIALISATION
 
@@ -68,6 +89,27 @@ class sync():
         self.log = log
         self.log.debug("instansiating a new 'sync' object")
         self.settings = settings
+        # AN OPTIONAL DIRECTORY TO CACHE PARSED TASKPAPER DOCUMENTS IN
+        self.cacheDir = None
+        if settings and "cacheDirectory" in settings:
+            self.cacheDir = settings["cacheDirectory"]
+        if settings and "documentPool" in settings:
+            document.pool.resize(**settings["documentPool"])
+        # STAMP THE ORIGINAL TASKS WITH AN ID TAG SO COMPLETIONS IN AN INDEX CAN FIND THEM DIRECTLY
+        self.taskIds = False
+        if settings and settings.get("syncTaskIds"):
+            self.taskIds = True
+        # ONE HTML PAGE PER SYNC TAG SET, OR SPLIT BY SOURCE FILE [set|file]
+        self.htmlPages = "set"
+        if settings and settings.get("htmlPages"):
+            self.htmlPages = settings["htmlPages"]
+        if self.htmlPages not in ("set", "file"):
+            message = 'the htmlPages setting must be set or file, not %s' % (
+                self.htmlPages,)
+            self.log.critical(message)
+            raise ValueError(message)
+        self.htmlTemplate = read_page_template(
+            settings and settings.get("htmlTemplate"))
         self.workspaceRoot = workspaceRoot
         self.syncFolder = syncFolder
         workflowTags = self.settings["workflowTags"]
@@ -104,11 +146,15 @@ class sync():
         return None
 
     def sync(
-        self
+        self,
+        jobs=1
     ):
         """
         *sync the tasks tagged with a tag in the sync-tags set to index taskpaper document and HTML page*
 
+        **Key Arguments:**
+            - ``jobs`` -- the number of processes to extract the tagged tasks of the workspace files in (0 for one per CPU). The indexes are identical whatever the number of processes. Default *1*
+
         **Return:**
             - None
 
@@ -118,25 +164,41 @@ class sync():
         self.log.info('starting the ``sync`` method')
 
         taskpaperFiles = self._get_all_taskpaper_files(self.workspaceRoot)
-        for k, v in self.syncTagSets.iteritems():
-            self._complete_original_tasks(setName=k)
+        self._complete_original_tasks(setNames=self.syncTagSets.keys())
 
+        cache = self._read_sync_cache()
+        contents = self._get_tagged_content_from_taskpaper_files(
+            taskpaperFiles,
+            tagSets=self.syncTagSets,
+            includeFileTags=self.includeFileTags,
+            cache=cache,
+            jobs=jobs
+        )
         for k, v in self.syncTagSets.iteritems():
-            workflowTagSet = False
-            for tag in v:
-                if tag in self.workflowTags:
-                    workflowTagSet = True
+            content = contents[k]
+            if not content:
+                if cache:
+                    cache["outputs"].pop(k, None)
+                continue
 
-            content = self._get_tagged_content_from_taskpaper_files(
-                taskpaperFiles,
-                tagSet=v,
-                workflowTagSet=workflowTagSet,
-                includeFileTags=self.includeFileTags
-            )
-            if content:
-                taskpaperDocPath = self._create_single_taskpaper_task_list(
-                    content, setName=k)
-                self._create_html_tasklist(taskpaperDocPath)
+            # LEAVE THE INDEX ALONE IF ITS CONTENT AND FILES ARE AS LAST WRITTEN
+            taskpaperDocPath = self._get_index_path(k)
+            htmlFilePath = taskpaperDocPath.replace(".taskpaper", ".html")
+            contentHash = hashlib.sha1(content.encode("utf-8")).hexdigest()
+            previous = cache and cache["outputs"].get(k)
+            if previous and previous[0] == contentHash and _is_unchanged(taskpaperDocPath, previous[1]) and (self.editorialRootPath or _is_unchanged(htmlFilePath, previous[2])):
+                self.log.info(
+                    "the %(k)s index is unchanged, not rewriting it" % locals())
+                continue
+
+            doc = self._create_single_taskpaper_task_list(
+                content, setName=k)
+            self._create_html_tasklist(doc, setName=k)
+            if cache:
+                cache["outputs"][k] = (contentHash, file_fingerprint(
+                    taskpaperDocPath), file_fingerprint(htmlFilePath))
+
+        self._write_sync_cache(cache)
 
         # self._generate_sync_documents()
 
@@ -197,15 +259,11 @@ class sync():
         """
         self.log.info('starting the ``_get_all_taskpaper_files`` method')
 
-        theseFiles = recursive_directory_listing(
-            log=self.log,
-            baseFolderPath=self.workspaceRoot,
-            whatToList="files"  # all | files | dirs
-        )
-
-        taskpaperFiles = []
-        taskpaperFiles[:] = [f for f in theseFiles if os.path.splitext(f)[
-            1] == ".taskpaper" and self.syncFolder not in f]
+        ignore = list(defaultIgnores)
+        if self.settings.get("ignorePatterns"):
+            ignore += self.settings["ignorePatterns"]
+        taskpaperFiles = list(find_files(
+            workspaceRoot, extension=".taskpaper", ignore=ignore, ignorePaths=[self.syncFolder]))
 
         self.log.info('completed the ``_get_all_taskpaper_files`` method')
         return taskpaperFiles
@@ -213,67 +271,138 @@ class sync():
     def _get_tagged_content_from_taskpaper_files(
             self,
             taskpaperFiles,
-            tagSet,
+            tagSets,
             editorial=False,
-            workflowTagSet=False,
-            includeFileTags=True):
-        """*get all tasks tagged with a sync-tag from taskpaper files*
+            includeFileTags=True,
+            cache=None,
+            jobs=1):
+        """*get all tasks tagged with a sync-tag from taskpaper files, for every sync-tag set in a single pass over the files*
+
+        Each file is read and parsed once, and never changed: the index entry of each tagged task (its retagged first line, the path of its source and its notes and subtasks) is written straight from the source document, so an entry only costs the time to write the task out.
+
+        Given a sync cache (see ``_read_sync_cache``), the entries of files that have not changed since the last sync are taken from the cache, and the cache is updated with the entries of the files read afresh.
 
         **Key Arguments:**
             - ``taskpaperFiles`` -- paths to all taskpaper files in workspace
-            - ``tagSet`` -- the tagset to extract from the taskpaper files.
+            - ``tagSets`` -- a dictionary of the tag sets to extract from the taskpaper files (set name to list of tags)
             - ``editorial`` -- format links for editorial ios apps
-            - ``workflowTagSet`` -- does the tag set contain workflow tags (if not skip the non-live project lists)
             - ``includeFileTags`` -- if the tag is in the filepath (e.g. /@due/mytasks.taskpaper) include all items the file in that tag set
+            - ``cache`` -- the sync cache. Default *None* (extract every file)
+            - ``jobs`` -- the number of processes to extract the files in (0 for one per CPU). Default *1* (extract them in this process)
 
         **Return:**
-            - ``content`` -- the given tagged content of all taskpaper files in a workspace (string)
+            - ``contents`` -- a dictionary of set name to the tagged content of all taskpaper files in the workspace (string)
         """
         self.log.info(
             'starting the ``_get_tagged_content_from_taskpaper_files`` method')
 
-        content = ""
+        tagSetRules = self._get_tag_set_rules(tagSets)
+
+        cachedFiles = {}
+        if cache:
+            cachedFiles = cache["files"]
+        # WORK OUT WHICH FILES HAVE CHANGED SINCE THE LAST SYNC
+        fingerprints = []
+        changed = []
         for tp in taskpaperFiles:
+            previous = cachedFiles.get(tp)
+            fingerprint = file_fingerprint(tp, previous and previous[0])
+            fingerprints.append(fingerprint)
+            if not (fingerprint and previous and fingerprint[2] == previous[0][2]):
+                changed.append(tp)
+        extracted = dict(zip(changed, self._extract_tagged_entries(
+            changed, tagSetRules, includeFileTags, jobs)))
+
+        # MERGE THE ENTRIES IN THE ORDER OF THE FILES, HOWEVER THEY WERE EXTRACTED
+        files = {}
+        contents = dict((setName, []) for setName in tagSets)
+        for tp, fingerprint in zip(taskpaperFiles, fingerprints):
+            if tp in extracted:
+                entries = extracted[tp]
+                # STAMPING TASK IDS MAY HAVE CHANGED THE FILE
+                if self.taskIds and fingerprint:
+                    fingerprint = file_fingerprint(tp, fingerprint)
+            else:
+                entries = cachedFiles[tp][1]
+            if fingerprint:
+                files[tp] = (fingerprint, entries)
+            for setName, entry in entries.iteritems():
+                contents[setName].append(entry)
+
+        for setName in contents:
+            contents[setName] = "".join(contents[setName])
+        if cache:
+            cache["files"] = files
+        self.log.info('extracted the tagged tasks of %s of %s taskpaper files (the rest were unchanged)' % (
+            len(changed), len(taskpaperFiles)))
 
-            done = False
-            if not workflowTagSet:
-                for tag in ["@next", "@hold", "@done", "@someday"]:
-                    if "/" + tag + "/" in tp:
-                        done = True
-            if done:
-                continue
+        self.log.info(
+            'completed the ``_get_tagged_content_from_taskpaper_files`` method')
+        return contents
 
-            # OPEN TASKPAPER FILE
-            doc = document(tp)
-            basename = os.path.basename(tp).replace("-", " ").upper()
-            archive = doc.get_project("Archive")
-            if archive:
-                archive.delete()
+    def _extract_tagged_entries(
+            self,
+            taskpaperFiles,
+            tagSetRules,
+            includeFileTags=True,
+            jobs=1):
+        """*extract the index entries of many taskpaper files, in a pool of worker processes if asked to*
 
-            fileTagged = False
-            done = False
-            for tag in tagSet:
-                if includeFileTags == True:
-                    tag = "@" + tag.replace("@", "")
-                    if "/%(tag)s/" % locals() in tp:
-                        fileTagged = True
-                if "/@done/" in tp:
-                    done = True
+        **Key Arguments:**
+            - ``taskpaperFiles`` -- paths to the taskpaper files to extract
+            - ``tagSetRules`` -- the rules of the sync tag sets (see ``_get_tag_set_rules``)
+            - ``includeFileTags`` -- if the tag is in the filepath (e.g. /@due/mytasks.taskpaper) include all items the file in that tag set
+            - ``jobs`` -- the number of worker processes (0 for one per CPU). Default *1* (run in this process)
 
-            if done:
-                continue
+        **Return:**
+            - ``entriesList`` -- a list of the entries of each file (see ``_get_tagged_entries_from_taskpaper_file``), in the order of ``taskpaperFiles``
+        """
+        if jobs < 1:
+            jobs = multiprocessing.cpu_count()
+        jobs = min(jobs, len(taskpaperFiles))
+
+        if jobs <= 1:
+            return [self._get_tagged_entries_from_taskpaper_file(tp, tagSetRules, includeFileTags) for tp in taskpaperFiles]
+
+        # LOGGERS CAN NOT BE PICKLED, SO THE WORKERS LOOK THEIRS UP BY NAME
+        worker = (getattr(self.log, "name", None), self.settings, self.workspaceRoot, self.workspaceName,
+                  self.syncFolder, self.editorialRootPath, includeFileTags, tagSetRules)
+        pool = multiprocessing.Pool(
+            processes=jobs, initializer=_start_worker, initargs=(worker,))
+        try:
+            # ``map`` HANDS BACK THE RESULTS IN THE ORDER OF THE FILES
+            entriesList = pool.map(_extract_in_worker, taskpaperFiles,
+                                   chunksize=max(1, len(taskpaperFiles) // (jobs * 4)))
+        finally:
+            pool.close()
+            pool.join()
 
-            # GENERATE THE EDITORIAL FILE LINK
-            if self.editorialRootPath:
-                tp = urllib.quote(tp)
-                tp = tp.replace(
-                    self.editorialRootPath, "editorial://open") + "?root=dropbox"
+        return entriesList
 
+    def _get_tag_set_rules(
+            self,
+            tagSets):
+        """*work out the subordinate/high level workflow tags of each sync tag, up front for all the files*
+
+        **Key Arguments:**
+            - ``tagSets`` -- a dictionary of the tag sets (set name to list of tags)
+
+        **Return:**
+            - ``tagSetRules`` -- a list of ``(setName, tagSet, workflowTagSet, tagRules)`` tuples, where ``tagRules`` is a list of ``(tag, etag, lesserTags, greaterTags)`` tuples
+        """
+        tagSetRules = []
+        for setName, tagSet in tagSets.iteritems():
+            # DOES THE TAG SET CONTAIN WORKFLOW TAGS (IF NOT SKIP THE
+            # NON-LIVE PROJECT LISTS)
+            workflowTagSet = False
+            for tag in tagSet:
+                if tag in self.workflowTags:
+                    workflowTagSet = True
+
+            tagRules = []
             for tag in tagSet:
                 tag = "@" + tag.replace("@", "")
                 etag = "%40" + tag.replace("@", "")
-
-                # DETERMINE THE SUBORDINATE/HIGH LEVEL TAGS
                 lesserTags = []
                 greaterTags = []
                 if workflowTagSet:
@@ -290,46 +419,188 @@ class sync():
 
                         else:
                             greaterTags.append(t)
+                tagRules.append((tag, etag, lesserTags, " ".join(greaterTags)))
+            tagSetRules.append((setName, tagSet, workflowTagSet, tagRules))
+
+        return tagSetRules
+
+    def _get_tagged_entries_from_taskpaper_file(
+            self,
+            tp,
+            tagSetRules,
+            includeFileTags=True):
+        """*get the index entries of the tasks tagged with a sync-tag in a single taskpaper file, for every sync-tag set*
+
+        **Key Arguments:**
+            - ``tp`` -- path to the taskpaper file
+            - ``tagSetRules`` -- the rules of the sync tag sets (see ``_get_tag_set_rules``)
+            - ``includeFileTags`` -- if the tag is in the filepath (e.g. /@due/mytasks.taskpaper) include all items the file in that tag set
+
+        **Return:**
+            - ``entries`` -- a dictionary of set name to the content extracted for the set (only sets with content are included)
+
+        With ``syncTaskIds`` turned on, indexed tasks without an ID of their own are stamped with one and the file is saved.
+        """
+        entries = {}
+        if "/@done/" in tp:
+            return entries
+
+        # GENERATE THE EDITORIAL FILE LINK
+        link = tp
+        if self.editorialRootPath:
+            link = urllib.quote(link)
+            link = link.replace(
+                self.editorialRootPath, "editorial://open") + "?root=dropbox"
+
+        doc = None
+        indexed = []
+        for setName, tagSet, workflowTagSet, tagRules in tagSetRules:
+            done = False
+            if not workflowTagSet:
+                for tag in ["@next", "@hold", "@done", "@someday"]:
+                    if "/" + tag + "/" in tp:
+                        done = True
+            if done or not tagRules:
+                continue
+
+            fileTagged = False
+            if includeFileTags == True:
+                for tag, etag, lesserTags, greaterTags in tagRules:
+                    if "/%(tag)s/" % locals() in tp:
+                        fileTagged = True
+
+            # OPEN AND PARSE THE TASKPAPER FILE ONCE, FOR ALL THE TAG SETS
+            if doc is None:
+                doc = document.open(tp, cacheDir=self.cacheDir)
+                archive = doc.get_project("Archive")
 
-                # FOR DOCUMENT WITH THIS SYNC TAG
+            for tag, etag, lesserTags, greaterTags in tagRules:
+                # FOR DOCUMENT WITH THIS SYNC TAG EVERY TASK IS
+                # RETAGGED IN ITS INDEX ENTRY
+                retag = None
                 filteredTasks = []
-                if ("/%(tag)s/" % locals() in tp or "/%(etag)s/" % locals() in tp) and includeFileTags == True:
+                if ("/%(tag)s/" % locals() in link or "/%(etag)s/" % locals() in link) and includeFileTags == True:
+                    retag = functools.partial(
+                        _retag, tag=tag, lesserTags=lesserTags, greaterTags=greaterTags)
                     filteredTasks = doc.all_tasks()
-                    for ft in filteredTasks:
-                        trumped = False
-                        for t in ft.tags:
-                            if t in " ".join(greaterTags):
-                                trumped = True
-                        if not trumped:
-                            for t in lesserTags:
-                                ft.del_tag(t)
-                            ft.add_tag(tag)
                 elif not fileTagged:
-                    filteredProjects = doc.tagged_projects(tag)
-                    for p in filteredProjects:
-                        allTasks = p.all_tasks()
-                        for ft in filteredTasks:
-                            trumped = False
-                            for t in ft.tags:
-                                if t in " ".join(greaterTags):
-                                    trumped = True
-                            if not trumped:
-                                for t in lesserTags:
-                                    ft.del_tag(t)
-                                ft.add_tag(tag)
                     filteredTasks = doc.tagged_tasks(tag)
                 for ft in filteredTasks:
-                    if "done" not in "".join(ft.tags):
-                        if "Project" in ft.parent.__repr__():
-                            thisNote = tp + " > " + ft.parent.title[:-1]
-                        else:
-                            thisNote = tp
-                        ft.add_note(thisNote)
-                        content += ft.to_string() + "\n"
+                    # TASKS IN THE ARCHIVE ARE NOT INDEXED
+                    if archive and _is_within(ft, archive):
+                        continue
+                    tags = ft.tags
+                    if retag:
+                        tags = retag(tags)
+                    if "done" not in "".join(tags):
+                        indexed.append((setName, ft, retag))
+
+        # STAMP ALL THE TASK IDS IN ONE EDIT OF THE FILE
+        if self.taskIds and len(indexed):
+            stamped = False
+            counters = {}
+            with doc.batch():
+                for setName, ft, retag in indexed:
+                    if _stamp_task_id(doc, ft, counters):
+                        stamped = True
+            if stamped:
+                doc.save()
+
+        for setName, ft, retag in indexed:
+            if "Project" in ft.parent.__repr__():
+                thisNote = link + " > " + ft.parent.title[:-1]
+            else:
+                thisNote = link
+            entries.setdefault(setName, []).append(ft.to_string(
+                notes=[thisNote] + ft.notes, retag=retag) + "\n")
 
-        self.log.info(
-            'completed the ``_get_tagged_content_from_taskpaper_files`` method')
-        return content
+        for setName in entries:
+            entries[setName] = "".join(entries[setName])
+        return entries
+
+    def _get_index_path(
+            self,
+            setName):
+        """*get the path of the index taskpaper document of a sync tag set*
+
+        **Key Arguments:**
+            - ``setName`` -- the name of the sync tag set
+
+        **Return:**
+            - ``taskpaperDocPath`` -- path to the task index taskpaper doc
+        """
+        if self.editorialRootPath:
+            taskpaperDocPath = self.syncFolder + "/e-" + \
+                self.workspaceName + "-" + setName + "-tasks.taskpaper"
+        else:
+            taskpaperDocPath = self.syncFolder + "/" + \
+                self.workspaceName + "-" + setName + "-tasks.taskpaper"
+        return taskpaperDocPath
+
+    def _read_sync_cache(
+            self):
+        """*read what the last sync of the workspace extracted from each file, and wrote to each index*
+
+        The cache is kept in the cache directory set in the settings file (``cacheDirectory``), outside of the sync folder, so a sync never touches the synced folder just to record its own work. It is only good for the same sync tag sets, workflow tags and options it was written with.
+
+        **Return:**
+            - ``cache`` -- a dictionary with the fingerprint and extracted entries of each taskpaper file (``files``) and the content hash and file fingerprints of each index last written (``outputs``). ``None`` if there is no cache directory
+        """
+        if not self.cacheDir:
+            return None
+
+        settingsKey = (tuple(sorted((k, tuple(v)) for k, v in self.syncTagSets.iteritems())), tuple(
+            self.workflowTags), self.includeFileTags, self.editorialRootPath, self.workspaceName, self.taskIds, self.htmlPages, hashlib.sha1(self.htmlTemplate.encode("utf-8")).hexdigest())
+        cache = {"version": syncCacheVersion,
+                 "settings": settingsKey, "files": {}, "outputs": {}}
+        try:
+            with open(self._sync_cache_path(), "rb") as readFile:
+                cached = marshal.load(readFile)
+            if cached["version"] == syncCacheVersion and cached["settings"] == settingsKey:
+                cache = cached
+        except (IOError, OSError, EOFError, ValueError, TypeError, KeyError):
+            pass
+
+        # REMEMBER WHAT WAS READ, SO AN UNCHANGED CACHE IS NOT WRITTEN BACK
+        self._syncCacheData = marshal.dumps(cache)
+        return cache
+
+    def _write_sync_cache(
+            self,
+            cache):
+        """*write the sync cache back to the cache directory, if anything in it has changed*
+
+        The cache is a convenience only, so a cache that can not be written is simply skipped.
+
+        **Key Arguments:**
+            - ``cache`` -- the sync cache (see ``_read_sync_cache``)
+        """
+        if cache is None:
+            return None
+        data = marshal.dumps(cache)
+        if data == getattr(self, "_syncCacheData", None):
+            return None
+
+        cachePath = self._sync_cache_path()
+        try:
+            if not os.path.exists(os.path.dirname(cachePath)):
+                os.makedirs(os.path.dirname(cachePath))
+            atomic_write(cachePath, lambda writeFile: writeFile.write(
+                data), encoding=None)
+        except (IOError, OSError):
+            pass
+        self._syncCacheData = data
+
+        return None
+
+    def _sync_cache_path(
+            self):
+        """*the path of the sync cache of this workspace, sync folder and workspace name*"""
+        key = "\n".join([os.path.abspath(self.workspaceRoot), os.path.abspath(
+            self.syncFolder), self.workspaceName])
+        if isinstance(key, unicode):
+            key = key.encode("utf-8")
+        return os.path.join(os.path.expanduser(self.cacheDir), hashlib.sha1(key).hexdigest() + ".sync")
 
     def _create_single_taskpaper_task_list(
             self,
@@ -337,58 +608,44 @@ class sync():
             setName):
         """*create single, sorted taskpaper task list from content pulled in from all of the workspace taskpaper docs*
 
+        The index is built and sorted in memory, and written to its file once.
+
         **Key Arguments:**
             - ``content`` -- the content to add to the taskpaper task index
             - ``setName`` -- the name of the sync tag set
 
         **Return:**
-            - ``taskpaperDocPath`` -- path to the task index taskpaper doc
+            - ``doc`` -- the task index taskpaper doc (``None`` if there is no content)
         """
         self.log.info(
             'starting the ``_create_single_taskpaper_task_list`` method')
 
-        taskpaperDocPath = None
+        doc = None
         if len(content):
-            # content = content.decode("utf-8")
-            if self.editorialRootPath:
-                taskpaperDocPath = self.syncFolder + "/e-" + \
-                    self.workspaceName + "-" + setName + "-tasks.taskpaper"
-            else:
-                taskpaperDocPath = self.syncFolder + "/" + \
-                    self.workspaceName + "-" + setName + "-tasks.taskpaper"
-            try:
-                self.log.debug("attempting to open the file %s" %
-                               (taskpaperDocPath,))
-                writeFile = codecs.open(
-                    taskpaperDocPath, encoding='utf-8', mode='w')
-            except IOError, e:
-                message = 'could not open the file %s' % (taskpaperDocPath,)
-                self.log.critical(message)
-                raise IOError(message)
-            writeFile.write(content)
-            writeFile.close()
-            # OPEN TASKPAPER FILE
-            if self.editorialRootPath:
-                doc = document(self.syncFolder + "/e-" +
-                               self.workspaceName + "-" + setName + "-tasks.taskpaper")
-            else:
-                doc = document(self.syncFolder + "/" +
-                               self.workspaceName + "-" + setName + "-tasks.taskpaper")
+            taskpaperDocPath = self._get_index_path(setName)
+            doc = document.from_string(
+                content, filepath=taskpaperDocPath, cacheDir=self.cacheDir)
             doc.sort_projects(workflowTags=self.workflowTags)
             doc.sort_tasks(workflowTags=self.workflowTags)
+            self.log.debug("attempting to write the file %s" %
+                           (taskpaperDocPath,))
             doc.save()
 
         self.log.info(
             'completed the ``_create_single_taskpaper_task_list`` method')
-        return taskpaperDocPath
+        return doc
 
     def _create_html_tasklist(
             self,
-            taskpaperDocPath):
+            doc,
+            setName=""):
         """*create an html version of the single taskpaper index task list*
 
+        The page is streamed straight from the index document to its file (see ``tastic.workspace.htmlrender``), through the ``htmlTemplate`` of the settings if one is given. With the ``htmlPages`` setting set to *file* the tasks are split into one page for each source file, in a folder named after the index, and the index page links to them.
+
         **Key Arguments:**
-            - ``taskpaperDocPath`` -- path to the task index taskpaper doc
+            - ``doc`` -- the task index taskpaper doc
+            - ``setName`` -- the name of the sync tag set. Default *""*
 
         **Return:**
             - ``htmlFilePath`` -- the path to the output HTML file
@@ -399,122 +656,307 @@ class sync():
             return
 
         title = self.workspaceName
-        content = "<h1>%(title)s tasks</h1><ul>\n" % locals()
-
-        # OPEN TASKPAPER FILE
-        doc = document(taskpaperDocPath)
-        docTasks = doc.tasks
-
-        for task in docTasks:
-
-            tagString = " ".join(task.tags)
-            tagString2 = ""
-            for t in task.tags:
-                t1 = t.split("(")[0]
-                tagString2 += """ <span class="%(t1)s tag">@%(t)s</span>""" % locals()
-
-            notes = task.notes
-            filepath = notes[0].title.split(" > ")[0]
-            basename = os.path.basename(filepath).replace(
-                ".taskpaper", "").replace("-", " ")
-            filepath = "dryx-open://" + filepath
-            taskTitle = u"""<a href="%(filepath)s"><span class="bullet %(tagString)s">◉</span> </a>""" % locals() + \
-                task.title[2:] + tagString2
-
-            if len(notes[0].title.split(" > ")) > 1:
-                parent = notes[0].title.split(" > ")[1]
-                parent = """<span class="parent">%(basename)s > %(parent)s</span></br>\n""" % locals(
-                )
-            else:
-                parent = """<span class="parent">%(basename)s</span></br>\n""" % locals(
-                )
-            taskContent = """</span>\n\t\t</br><span class="notes">""".join(task.to_string(
-                title=False, indentLevel=0).split("\n")[1:])
-            if len(taskContent):
-                taskContent = """\n\t<br><span class="notes">""" + \
-                    taskContent + """\n\t</span>"""
-            else:
-                taskContent = ""
-
-            htmlTask = """<li class="XXX">%(parent)s%(taskTitle)s%(taskContent)s</li>\n"""  % locals()
-            content += htmlTask
-
-        content += "</ul>"
-
-        htmlFilePath = taskpaperDocPath.replace(".taskpaper", ".html")
-        try:
-            self.log.debug("attempting to open the file %s" % (htmlFilePath,))
-            writeFile = codecs.open(
-                htmlFilePath, encoding='utf-8', mode='w')
-        except IOError, e:
-            message = 'could not open the file %s' % (htmlFilePath,)
-            self.log.critical(message)
-            raise IOError(message)
-        writeFile.write(content)
-        writeFile.close()
+        template = self.htmlTemplate
+        htmlFilePath = doc.filepath.replace(".taskpaper", ".html")
+        self.log.debug("attempting to write the file %s" % (htmlFilePath,))
+
+        if self.htmlPages == "set":
+            atomic_write(htmlFilePath, lambda writeFile: write_html_page(
+                writeFile, doc.tasks, template=template, title=title, setName=setName, retag=_hide_task_id))
+            self.log.info('completed the ``_create_html_tasklist`` method')
+            return htmlFilePath
+
+        # GROUP THE TASKS BY THEIR SOURCE FILE, KEEPING THE ORDER OF THE INDEX
+        sources = collections.OrderedDict()
+        for task in doc.tasks:
+            source = task.notes[0].title.split(" > ")[0].strip()
+            sources.setdefault(source, []).append(task)
+
+        pagesFolder = htmlFilePath[:-len(".html")]
+        if not os.path.exists(pagesFolder):
+            os.makedirs(pagesFolder)
+        pages = []
+        pageNames = set()
+        for source in sorted(sources):
+            label = source
+            if source.startswith(self.workspaceRoot):
+                label = os.path.relpath(source, self.workspaceRoot)
+            pageName = _page_name(source)
+            pageNames.add(pageName)
+            tasks = sources[source]
+            atomic_write(os.path.join(pagesFolder, pageName), lambda writeFile: write_html_page(
+                writeFile, tasks, template=template, title=u"%s > %s" % (title, label), setName=setName, retag=_hide_task_id))
+            href = urllib.quote((os.path.basename(pagesFolder) +
+                                 "/" + pageName).encode("utf-8"))
+            pages.append((href, label, len(tasks)))
+
+        # REMOVE THE PAGES OF SOURCE FILES THAT NO LONGER HAVE TASKS IN THE INDEX
+        for pageName in os.listdir(pagesFolder):
+            if pageName.endswith(".html") and pageName not in pageNames:
+                os.remove(os.path.join(pagesFolder, pageName))
+
+        atomic_write(htmlFilePath, lambda writeFile: write_html_contents(
+            writeFile, pages, template=template, title=title, setName=setName))
 
         self.log.info('completed the ``_create_html_tasklist`` method')
         return htmlFilePath
 
     def _complete_original_tasks(
             self,
-            setName):
-        """*mark original tasks as completed if they are marked as complete in the index taskpaper document*
+            setNames):
+        """*mark original tasks as completed if they are marked as complete in the index taskpaper documents*
+
+        The completed tasks of all the index documents are grouped by the file they came from, so each original file is opened, tidied and saved (atomically, and only if changed) once however many of its tasks were completed. A task carrying an ID (see the ``syncTaskIds`` setting) is found by a single lookup in the document's tag index. Other tasks are found through the title index (see ``get_project`` and ``get_task``).
 
         **Key Arguments:**
-            - ``setName`` -- the name of the sync tag set
+            - ``setNames`` -- the names of the sync tag sets
         """
         self.log.info('starting the ``_complete_original_tasks`` method')
 
-        if self.editorialRootPath:
-            taskpaperDocPath = self.syncFolder + "/e-" + \
-                self.workspaceName + "-" + setName + "-tasks.taskpaper"
-        else:
-            taskpaperDocPath = self.syncFolder + "/" + \
-                self.workspaceName + "-" + setName + "-tasks.taskpaper"
-        exists = os.path.exists(taskpaperDocPath)
-        if not exists:
-            return
+        # GROUP THE COMPLETED TASKS BY THE FILE THEY CAME FROM
+        completions = collections.OrderedDict()
+        for setName in setNames:
+            taskpaperDocPath = self._get_index_path(setName)
+            exists = os.path.exists(taskpaperDocPath)
+            if not exists:
+                continue
 
-        # OPEN TASKPAPER INDEX FILE
-        doc = document(taskpaperDocPath)
-        doneTasks = doc.tagged_tasks("@done")
-
-        for t in doneTasks:
-            theseNotes = t.notes
-            parent = t.parent
-            while not len(theseNotes) and parent and parent.parent:
-                theseNotes = parent.notes
-                parent = parent.parent
-
-            if self.editorialRootPath:
-                theseNotes[0].title = theseNotes[0].title.replace(
-                    "editorial://open", self.editorialRootPath).replace("?root=dropbox", "")
-                theseNotes[0].title = urllib.unquote(
-                    theseNotes[0].title).replace("%40", "@")
-
-            originalFile = theseNotes[0].title.split(" > ")[0].strip()
-            if len(theseNotes[0].title.split(" > ")) > 1:
-                projectName = theseNotes[0].title.split(" > ")[1].strip()
-            else:
-                projectName = False
+            # OPEN TASKPAPER INDEX FILE
+            doc = document.open(taskpaperDocPath, cacheDir=self.cacheDir)
+            doneTasks = doc.tagged_tasks("@done")
+
+            for t in doneTasks:
+                theseNotes = t.notes
+                parent = t.parent
+                while not len(theseNotes) and parent and parent.parent:
+                    theseNotes = parent.notes
+                    parent = parent.parent
+
+                source = theseNotes[0].title
+                if self.editorialRootPath:
+                    source = source.replace(
+                        "editorial://open", self.editorialRootPath).replace("?root=dropbox", "")
+                    source = urllib.unquote(source).replace("%40", "@")
+
+                originalFile = source.split(" > ")[0].strip()
+                if len(source.split(" > ")) > 1:
+                    projectName = source.split(" > ")[1].strip()
+                else:
+                    projectName = False
+                completions.setdefault(originalFile, []).append(
+                    (projectName, t.title, _task_id(t.tags)))
 
-            odoc = document(originalFile)
+        for originalFile, tasks in completions.iteritems():
+            odoc = document.open(originalFile, cacheDir=self.cacheDir)
             odoc.tidy()
+            with odoc.batch():
+                for projectName, taskTitle, taskId in tasks:
+                    if taskId:
+                        matches = odoc.tagged_tasks(
+                            "@%s(%s)" % (taskIdTag, taskId))
+                        if len(matches):
+                            matches[0].done("all")
+                            continue
+
+                    if projectName:
+                        thisObject = odoc.get_project(projectName)
+                    else:
+                        thisObject = odoc
+                    if not thisObject:
+                        continue
+
+                    oTask = thisObject.get_task(taskTitle)
+                    if oTask:
+                        oTask.done("all")
             odoc.save()
-            odoc = document(originalFile)
-            if projectName:
-                thisObject = odoc.get_project(projectName)
-            else:
-                thisObject = odoc
-
-            oTask = thisObject.get_task(t.title)
-            if oTask:
-                oTask.done("all")
-                odoc.save()
 
         self.log.info('completed the ``_complete_original_tasks`` method')
         return None
 
     # use the tab-trigger below for new method
     # xt-class-method
+
+
+def _retag(
+        tags,
+        tag,
+        lesserTags,
+        greaterTags):
+    """*the tags of a task in a file filed under a sync tag (e.g. /@due/mytasks.taskpaper), as written to the index*
+
+    Unless the task already carries a greater workflow tag, its lesser workflow tags are swapped for the sync tag.
+
+    **Key Arguments:**
+        - ``tags`` -- the task's tags (without the *@*)
+        - ``tag`` -- the sync tag
+        - ``lesserTags`` -- the workflow tags ranked below the sync tag
+        - ``greaterTags`` -- the workflow tags ranked above the sync tag (as a single string)
+
+    **Return:**
+        - ``tags`` -- the tags to write to the index
+    """
+    for t in tags:
+        if t in greaterTags:
+            return tags
+
+    lesserTags = [t.replace("@", "") for t in lesserTags]
+    tags = [t for t in tags if t not in lesserTags]
+    if tag.replace("@", "") not in tags:
+        tags.append(tag.replace("@", ""))
+    return tags
+
+
+def _is_within(
+        taskpaperObject,
+        ancestor):
+    """*is a taskpaper object nested (at any depth) within another?*
+
+    **Key Arguments:**
+        - ``taskpaperObject`` -- the nested object
+        - ``ancestor`` -- the object it may be nested within
+
+    **Return:**
+        - ``within`` -- True or False
+    """
+    node = taskpaperObject.meta.parent
+    while node is not None:
+        if node is ancestor.meta:
+            return True
+        node = node.parent
+    return False
+
+
+def _task_id(
+        tags):
+    """*the ID of a task, from its tags*
+
+    **Key Arguments:**
+        - ``tags`` -- the task's tags (without the *@*)
+
+    **Return:**
+        - ``taskId`` -- the ID (``None`` if the task has none)
+    """
+    for t in tags:
+        if t.startswith(taskIdTag + "(") and t.endswith(")"):
+            return t[len(taskIdTag) + 1:-1]
+    return None
+
+
+def _hide_task_id(
+        tags):
+    """*the tags of a task without its ID tag, as shown on the HTML page*"""
+    return [t for t in tags if _task_id([t]) is None]
+
+
+def _stamp_task_id(
+        doc,
+        task,
+        counters):
+    """*make sure a task carries an ID that no other task in its document has*
+
+    New IDs are the first 8 hex digits of a hash of the task's title and a counter, bumped until the ID is unused in the document, so they are compact, stable and never contain a workflow tag or *done*. A task copied along with its ID keeps the ID only if it comes first in the document.
+
+    **Key Arguments:**
+        - ``doc`` -- the taskpaper document holding the task
+        - ``task`` -- the task
+        - ``counters`` -- a dictionary of the next counter to try for each title, shared by all the tasks stamped in the document (so a file of many identically titled tasks is stamped in linear time)
+
+    **Return:**
+        - ``stamped`` -- True if the task was given a new ID
+    """
+    taskId = _task_id(task.tags)
+    if taskId is not None:
+        matches = doc.tagged_tasks("@%s(%s)" % (taskIdTag, taskId))
+        if not len(matches) or matches[0].meta is task.meta:
+            return False
+        task.del_tag("@%s(%s)" % (taskIdTag, taskId))
+
+    title = task.title
+    if isinstance(title, unicode):
+        title = title.encode("utf-8")
+    count = counters.get(title, 0)
+    while True:
+        taskId = hashlib.sha1("%s\n%s" % (title, count)).hexdigest()[:8]
+        count += 1
+        if not len(doc.tagged_tasks("@%s(%s)" % (taskIdTag, taskId))):
+            break
+    counters[title] = count
+    task.add_tag("@%s(%s)" % (taskIdTag, taskId))
+    return True
+
+
+def _page_name(
+        source):
+    """*the name of the HTML page of the tasks from a source file, when index pages are split by file*
+
+    **Key Arguments:**
+        - ``source`` -- path to the source taskpaper file
+
+    **Return:**
+        - ``pageName`` -- the file name of the page (the source file's name and a short hash of its path, so files of the same name in different folders get their own pages)
+    """
+    if isinstance(source, unicode):
+        key = source.encode("utf-8")
+    else:
+        key = source
+    basename = os.path.basename(source).replace(".taskpaper", "")
+    basename = re.sub(r"[^\w\-]+", "-", basename, flags=re.UNICODE)
+    return u"%s-%s.html" % (basename, hashlib.sha1(key).hexdigest()[:8])
+
+
+def _is_unchanged(
+        filepath,
+        fingerprint):
+    """*does a file still have the content it had when it was fingerprinted?*
+
+    **Key Arguments:**
+        - ``filepath`` -- path to the file
+        - ``fingerprint`` -- the fingerprint recorded for the file (see ``file_fingerprint``), or ``None``
+
+    **Return:**
+        - ``unchanged`` -- True or False
+    """
+    if not fingerprint:
+        return False
+    current = file_fingerprint(filepath, fingerprint)
+    return current is not None and current[2] == fingerprint[2]
+
+
+# THE SYNC OBJECT OF A WORKER PROCESS (SEE ``sync._extract_tagged_entries``)
+_worker = None
+
+
+def _start_worker(
+        worker):
+    """*set up a worker process to extract the tagged tasks of taskpaper files*
+
+    **Key Arguments:**
+        - ``worker`` -- a ``(logName, settings, workspaceRoot, workspaceName, syncFolder, editorialRootPath, includeFileTags, tagSetRules)`` tuple
+    """
+    global _worker
+    logName, settings, workspaceRoot, workspaceName, syncFolder, editorialRootPath, includeFileTags, tagSetRules = worker
+    tp = sync(
+        log=logging.getLogger(logName),
+        settings=settings,
+        workspaceRoot=workspaceRoot,
+        workspaceName=workspaceName,
+        syncFolder=syncFolder,
+        editorialRootPath=editorialRootPath,
+        includeFileTags=includeFileTags
+    )
+    _worker = (tp, tagSetRules)
+    return None
+
+
+def _extract_in_worker(
+        taskpaperPath):
+    """*extract the index entries of a single taskpaper file in a worker process*
+
+    **Key Arguments:**
+        - ``taskpaperPath`` -- path to the taskpaper file
+
+    **Return:**
+        - ``entries`` -- see ``sync._get_tagged_entries_from_taskpaper_file``
+    """
+    tp, tagSetRules = _worker
+    return tp._get_tagged_entries_from_taskpaper_file(taskpaperPath, tagSetRules, tp.includeFileTags)
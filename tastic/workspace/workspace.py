@@ -19,7 +19,19 @@ from operator import itemgetter
 import collections
 import codecs
 import textwrap
+import time
+import json
+import logging
+import traceback
+import multiprocessing
 from tastic.tastic import document
+from tastic.commonutils.atomicfile import atomic_write
+from tastic.commonutils.discovery import find_files, defaultIgnores
+from tastic.commonutils.fingerprint import file_fingerprint
+
+# THE FILE IN THE WORKSPACE ROOT RECORDING THE FILES LEFT SORTED BY THE LAST SORT
+sortManifestName = ".tastic-sort-manifest.json"
+sortManifestVersion = 1
 
 
 class workspace():
@@ -68,6 +80,12 @@ class workspace():
         self.log = log
         log.debug("instansiating a new 'sort' object")
         self.settings = settings
+        # AN OPTIONAL DIRECTORY TO CACHE PARSED TASKPAPER DOCUMENTS IN
+        self.cacheDir = None
+        if settings and "cacheDirectory" in settings:
+            self.cacheDir = settings["cacheDirectory"]
+        if settings and "documentPool" in settings:
+            document.pool.resize(**settings["documentPool"])
         self.taskpaperPath = False
         self.workspaceRoot = False
         # xt-self-arg-tmpx
@@ -83,10 +101,18 @@ class workspace():
 
         return None
 
-    def sort(self):
+    def sort(
+            self,
+            jobs=1):
         """
         *sort the workspace or individual taskpaper document via the workflow tags found in the settings file*
 
+        **Key Arguments:**
+            - ``jobs`` -- the number of files to sort in parallel, each in its own process (0 for one per CPU). Default *1*
+
+        **Return:**
+            - ``results`` -- a list of ``(taskpaperPath, seconds, error)`` tuples, one per file sorted (unchanged files are skipped). ``error`` is ``None`` for a file sorted without error, otherwise the traceback of the failure (a failure is logged and the rest of the files are still sorted)
+
         **Usage:**
 
             To sort all of the taskpaper documents in the workspace via the workflow tag set with the settings file, for example:
@@ -100,19 +126,70 @@ class workspace():
             .. code-block:: python 
 
                 ws.sort()
+
+            or to spread the files over 8 processes:
+
+            .. code-block:: python 
+
+                ws.sort(jobs=8)
+
+            A file that fails to sort is logged and reported in the results, while the rest of the files are still sorted:
+
+            .. code-block:: python 
+
+                results = ws.sort()
+                failed = [path for path, seconds, error in results if error]
+
+            When sorting a workspace, the fingerprint of each file left sorted is recorded (with the workflow tags used) in a ``.tastic-sort-manifest.json`` file in the workspace root. Files that have not changed since they were last sorted with the same workflow tags are skipped on the next run. Delete the manifest to force every file to be re-sorted.
         """
         self.log.info('starting the ``sort`` method')
 
+        workflowTags = self.settings["workflowTags"]
+        manifest = {}
+        if self.workspaceRoot:
+            manifest = self._read_sort_manifest(workflowTags)
+
+        # SKIP THE FILES THAT HAVE NOT CHANGED SINCE THEY WERE LAST SORTED
+        fingerprints = {}
+        unsorted = []
         for f in self.taskpaperFiles:
-            self._sort_tp_file(f)
+            key = os.path.relpath(f, self.workspaceRoot or ".")
+            previous = manifest.get(key)
+            fingerprint = file_fingerprint(f, previous)
+            # A FILE THAT WAS ONLY TOUCHED STILL HAS THE SAME CONTENT HASH
+            if fingerprint and previous and fingerprint[2] == previous[2]:
+                fingerprints[key] = fingerprint
+            else:
+                unsorted.append(f)
+        self.log.info('%s of %s taskpaper files unchanged since they were last sorted' % (
+            len(self.taskpaperFiles) - len(unsorted), len(self.taskpaperFiles)))
+
+        results = self._process_tp_files("_sort_tp_file", jobs, unsorted)
+
+        if self.workspaceRoot:
+            for taskpaperPath, seconds, error in results:
+                if error:
+                    continue
+                fingerprint = file_fingerprint(taskpaperPath)
+                if fingerprint:
+                    fingerprints[os.path.relpath(
+                        taskpaperPath, self.workspaceRoot)] = fingerprint
+            self._write_sort_manifest(workflowTags, fingerprints)
 
         self.log.info('completed the ``sort`` method')
-        return None
+        return results
 
     def archive_done(
-            self):
+            self,
+            jobs=1):
         """*move done tasks from the document's 'Archive' project into an adjacent markdown tasklog file*
 
+        **Key Arguments:**
+            - ``jobs`` -- the number of files to archive in parallel, each in its own process (0 for one per CPU). Default *1*
+
+        **Return:**
+            - ``results`` -- a list of ``(taskpaperPath, seconds, error)`` tuples, one per file (see ``sort``)
+
         **Usage:**
 
             To move the archived tasks within a workspace's taskpaper docs into ``-tasklog.md`` files use the ``archive_done()`` method:
@@ -123,10 +200,143 @@ class workspace():
         """
         self.log.info('starting the ``archive_done`` method')
 
-        for f in self.taskpaperFiles:
-            self._archive_tp_file_done_tasks(f)
+        results = self._process_tp_files("_archive_tp_file_done_tasks", jobs)
 
         self.log.info('completed the ``archive_done`` method')
+        return results
+
+    def _process_tp_files(
+            self,
+            methodName,
+            jobs=1,
+            taskpaperFiles=None):
+        """*run a method over every taskpaper file in the workspace, in a pool of worker processes if asked to*
+
+        **Key Arguments:**
+            - ``methodName`` -- the name of the method to call with each taskpaper filepath
+            - ``jobs`` -- the number of worker processes (0 for one per CPU). Default *1* (run in this process)
+            - ``taskpaperFiles`` -- the taskpaper filepaths to work on. Default *None* (all the files in the workspace)
+
+        **Return:**
+            - ``results`` -- a list of ``(taskpaperPath, seconds, error)`` tuples, one per file
+        """
+        self.log.info('starting the ``_process_tp_files`` method')
+
+        if taskpaperFiles is None:
+            taskpaperFiles = self.taskpaperFiles
+
+        if jobs < 1:
+            jobs = multiprocessing.cpu_count()
+        jobs = min(jobs, len(taskpaperFiles))
+
+        if jobs <= 1:
+            results = [self._process_tp_file(methodName, f)
+                       for f in taskpaperFiles]
+        else:
+            # LOGGERS CAN NOT BE PICKLED, SO THE WORKERS LOOK THEIRS UP BY NAME
+            logName = getattr(self.log, "name", None)
+            pool = multiprocessing.Pool(processes=jobs)
+            try:
+                results = pool.map(_process_tp_file, [
+                    (methodName, self.settings, logName, f) for f in taskpaperFiles], chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+
+        failed = len([r for r in results if r[2]])
+        seconds = sum(r[1] for r in results)
+        self.log.info('%s ran over %s files in %0.2fs of processing time (%s failed)' % (
+            methodName, len(results), seconds, failed))
+
+        self.log.info('completed the ``_process_tp_files`` method')
+        return results
+
+    def _process_tp_file(
+            self,
+            methodName,
+            taskpaperPath):
+        """*run a method on a single taskpaper file, timing it and catching any failure*
+
+        **Key Arguments:**
+            - ``methodName`` -- the name of the method to call with the taskpaper filepath
+            - ``taskpaperPath`` -- path to a taskpaper file
+
+        **Return:**
+            - ``result`` -- a ``(taskpaperPath, seconds, error)`` tuple. ``error`` is ``None``, or the traceback of the failure
+        """
+        start = time.time()
+        error = None
+        try:
+            getattr(self, methodName)(taskpaperPath)
+        except Exception:
+            error = traceback.format_exc()
+            self.log.error("%s failed for the file %s:\n%s" %
+                           (methodName, taskpaperPath, error))
+
+        return taskpaperPath, time.time() - start, error
+
+    def _read_sort_manifest(
+            self,
+            workflowTags):
+        """*read the fingerprints of the files left sorted by the last sort of the workspace*
+
+        **Key Arguments:**
+            - ``workflowTags`` -- the workflow tags the workspace is about to be sorted with
+
+        **Return:**
+            - ``fingerprints`` -- a dictionary of workspace-relative filepath to fingerprint. Empty if there is no manifest, it can not be read, or it was written with different workflow tags
+        """
+        # THE FINGERPRINTS OF A VALID MANIFEST, SO AN UNCHANGED ONE IS NOT REWRITTEN
+        self._sortManifestFiles = None
+        pathToReadFile = os.path.join(self.workspaceRoot, sortManifestName)
+        if not os.path.exists(pathToReadFile):
+            return {}
+        try:
+            self.log.debug("attempting to open the file %s" %
+                           (pathToReadFile,))
+            readFile = codecs.open(pathToReadFile, encoding='utf-8', mode='r')
+            try:
+                manifest = json.load(readFile)
+            finally:
+                readFile.close()
+            if manifest["version"] != sortManifestVersion or manifest["workflowTags"] != workflowTags:
+                return {}
+            self._sortManifestFiles = dict(
+                (k, tuple(v)) for k, v in manifest["files"].items())
+            return dict(self._sortManifestFiles)
+        except (IOError, ValueError, KeyError, TypeError, AttributeError):
+            self.log.warning(
+                "could not read the sort manifest %s, sorting every file" % (pathToReadFile,))
+            return {}
+
+    def _write_sort_manifest(
+            self,
+            workflowTags,
+            fingerprints):
+        """*record the fingerprints of the files left sorted in the workspace root, if they have changed since the manifest was read*
+
+        **Key Arguments:**
+            - ``workflowTags`` -- the workflow tags the files were sorted with
+            - ``fingerprints`` -- a dictionary of workspace-relative filepath to fingerprint
+        """
+        if fingerprints == getattr(self, "_sortManifestFiles", None):
+            return None
+
+        manifest = {
+            "version": sortManifestVersion,
+            "workflowTags": workflowTags,
+            "files": fingerprints
+        }
+        pathToWriteFile = os.path.join(self.workspaceRoot, sortManifestName)
+        try:
+            atomic_write(pathToWriteFile, lambda writeFile: writeFile.write(
+                json.dumps(manifest, indent=1, sort_keys=True)), encoding=None)
+        except (IOError, OSError):
+            # THE MANIFEST ONLY SAVES WORK - A READ-ONLY WORKSPACE CAN STILL BE SORTED
+            self.log.warning(
+                "could not write the sort manifest %s" % (pathToWriteFile,))
+            return None
+        self._sortManifestFiles = dict(fingerprints)
         return None
 
     def _get_all_taskpaper_files(
@@ -139,16 +349,11 @@ class workspace():
         self.log.info('starting the ``_get_all_taskpaper_files`` method')
 
         if self.workspaceRoot:
-            from fundamentals.files import recursive_directory_listing
-            theseFiles = recursive_directory_listing(
-                log=self.log,
-                baseFolderPath=self.workspaceRoot,
-                whatToList="files"  # all | files | dirs
-            )
-
-            taskpaperFiles = []
-            taskpaperFiles[:] = [f for f in theseFiles if os.path.splitext(f)[
-                1] == ".taskpaper"]
+            ignore = list(defaultIgnores)
+            if self.settings and self.settings.get("ignorePatterns"):
+                ignore += self.settings["ignorePatterns"]
+            taskpaperFiles = list(find_files(
+                self.workspaceRoot, extension=".taskpaper", ignore=ignore))
         else:
             taskpaperFiles = [self.taskpaperPath]
 
@@ -171,10 +376,8 @@ class workspace():
         # OPEN TASKPAPER FILE
 
         self.log.info("sorting taskpaper file %(taskpaperPath)s" % locals())
-        doc = document(taskpaperPath)
-        doc.tidy()
-        doc.sort_tasks(self.settings["workflowTags"])
-        doc.sort_projects(self.settings["workflowTags"])
+        doc = document.open(taskpaperPath, cacheDir=self.cacheDir)
+        doc.sort(self.settings["workflowTags"])
         doc.save()
 
         self.log.info('completed the ``_sort_tp_file`` method')
@@ -226,7 +429,7 @@ class workspace():
                     taskLog[dictt["task"] + dictt["completed"] +
                             dictt["project"]] = dictt
 
-        doc = document(taskpaperPath)
+        doc = document.open(taskpaperPath, cacheDir=self.cacheDir)
         aProject = doc.get_project("Archive")
         if not aProject:
             return
@@ -308,3 +511,23 @@ class workspace():
 
     # use the tab-trigger below for new method
     # xt-class-method
+
+
+def _process_tp_file(
+        job):
+    """*run a workspace method on a single taskpaper file in a worker process (see ``workspace._process_tp_files``)*
+
+    **Key Arguments:**
+        - ``job`` -- a ``(methodName, settings, logName, taskpaperPath)`` tuple
+
+    **Return:**
+        - ``result`` -- a ``(taskpaperPath, seconds, error)`` tuple
+    """
+    methodName, settings, logName, taskpaperPath = job
+    ws = workspace(
+        log=logging.getLogger(logName),
+        settings=settings,
+        fileOrWorkspacePath=taskpaperPath
+    )
+    return ws._process_tp_file(methodName, taskpaperPath)
+